@@ -0,0 +1,32 @@
+import argparse
+
+from loguru import logger
+
+from src.api import make_server
+
+# # # # # # # # # # # # # # # # # # # # #
+#                                       #
+#      HTTP JSON API over the catalog   #
+#                                       #
+# # # # # # # # # # # # # # # # # # # # #
+# python api.py --port 8080             #
+# curl localhost:8080/games?name=Dark*  #
+# # # # # # # # # # # # # # # # # # # # #
+
+def run():
+    parser = argparse.ArgumentParser(description = "HTTP JSON API: list, search and edit games")
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8080)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    logger.info(f"Listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    run()
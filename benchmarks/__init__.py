@@ -0,0 +1,107 @@
+"""
+Benchmarks for the games catalog
+Run a module: python -m benchmarks.<name> [rows ...]
+"""
+import os
+import json
+import time
+import random
+import tempfile
+import statistics
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from peewee import Database
+
+from src.database import open_database
+from src.models import Game, MODELS, create_schema
+
+WORDS = (
+    'dark', 'souls', 'star', 'war', 'legend', 'city', 'space', 'hero', 'night', 'king',
+    'тёмный', 'мир', 'война', 'легенда', 'город', 'космос', 'герой', 'ночь', 'король', 'сталкер',
+)
+AUTHORS = (
+    'Valve', 'Ubisoft', 'Bethesda', 'CD Projekt', 'Nival', 'GSC Game World',
+    'Акелла', 'Бука', '1С', 'Новый Диск', 'Mail.Ru', 'Owlcat',
+)
+
+BATCH_SIZE = 10_000
+
+def synthetic_games(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Generate pseudo-random games"""
+    rnd = random.Random(seed)
+    for i in range(count):
+        yield dict(
+            name = f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {i}".title(),
+            author = f"{rnd.choice(AUTHORS)} {i % 1000}",
+            year = rnd.randint(1980, 2024),
+        )
+
+def fill_games(count: int, seed: int = 0) -> None:
+    """Insert synthetic games into the bound database"""
+    games = synthetic_games(count, seed)
+    database = Game._meta.database
+    while True:
+        batch = [game for _, game in zip(range(BATCH_SIZE), games)]
+        if not batch:
+            break
+        with database.atomic():
+            Game.insert_many(map(Game.folded, batch)).execute()
+
+@contextmanager
+def temp_database(rows: int = 0, mode: Optional[str] = None, pool: int = 0, **pragmas) -> Iterator[Database]:
+    """Temporary database with the schema and `rows` synthetic games"""
+    with tempfile.TemporaryDirectory() as folder:
+        database = open_database(os.path.join(folder, 'bench.db'), mode = mode, pool = pool, **pragmas)
+        with database.bind_ctx(MODELS):
+            database.connect()
+            create_schema(database)
+            fill_games(rows)
+            try:
+                yield database
+            finally:
+                database.close()
+                if hasattr(database, 'close_all'):
+                    database.close_all()
+
+def measure(func: Callable, repeat: int = 20) -> float:
+    """Median time of one call in milliseconds"""
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def report(title: str, results: Dict[str, float], unit: str = 'ms') -> None:
+    """Print results as a table"""
+    print(f"[BENCH] {title}")
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"    {name.ljust(width)} | {value:10.3f} {unit}")
+
+def load_baseline(path: str) -> Optional[Dict[str, float]]:
+    """Saved results, None if there is no baseline yet"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding = 'utf-8') as f:
+        return json.load(f)
+
+def save_baseline(path: str, results: Dict[str, float]) -> None:
+    with open(path, 'w', encoding = 'utf-8') as f:
+        json.dump(results, f, indent = 4, sort_keys = True)
+
+def regressions(results: Dict[str, float],
+                baseline: Dict[str, float],
+                threshold: float,
+                min_delta: float = 0.1) -> List[str]:
+    """
+    Metrics slower than baseline by more than threshold (0.25 = +25%)
+    Differences below min_delta are timer noise and are ignored
+    """
+    slower = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is not None and value > base * (1 + threshold) and value - base > min_delta:
+            slower.append(f"{name}: {base:.3f} -> {value:.3f} (+{(value / max(base, 1e-9) - 1) * 100:.0f}%)")
+    return slower
@@ -0,0 +1,77 @@
+"""
+Write latency of single-row saves in different journal modes,
+synchronous (as main.py by default) and through the write-behind queue (GAMES_WRITE_BEHIND=1)
+Run: python -m benchmarks.database [rows]
+"""
+import sys
+import time
+import itertools
+import threading
+
+from src.database import MODES
+from src.models import Game
+from src.writer import WriteBehind
+from benchmarks import temp_database, measure, report
+
+ROWS = 10_000
+THREADS = 4
+WRITES_PER_THREAD = 200
+
+def bench_single(mode: str, rows: int) -> dict:
+    """save / update / delete_instance - каждая запись в своей транзакции, как в main.py"""
+    numbers = itertools.count()
+    results = {}
+    with temp_database(rows, mode = mode):
+        results['insert'] = measure(lambda: Game(name = f'Game {next(numbers)}', author = 'Bench', year = 2000).save(), repeat = 200)
+
+        game = Game.select().order_by(Game.id.desc()).get()
+        def update():
+            game.name = f'Game {next(numbers)}'
+            game.save()
+        results['update'] = measure(update, repeat = 200)
+
+        games = iter(Game.select().order_by(Game.id).limit(200))
+        results['delete'] = measure(lambda: next(games).delete_instance(), repeat = 200)
+    return results
+
+def bench_threads(mode: str, rows: int) -> float:
+    """Записей в секунду из нескольких потоков, у каждого своё соединение из пула"""
+    # + соединение главного потока, который заполняет базу
+    with temp_database(rows, mode = mode, pool = THREADS + 1) as database:
+        def worker(number: int) -> None:
+            with database.connection_context():
+                for i in range(WRITES_PER_THREAD):
+                    Game(name = f'Thread {number} {i}', author = 'Bench', year = 2000).save()
+
+        threads = [threading.Thread(target = worker, args = (number,)) for number in range(THREADS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return THREADS * WRITES_PER_THREAD / (time.perf_counter() - start)
+
+def bench_write_behind(mode: str, rows: int) -> dict:
+    """Задержка add через очередь записи и скорость записи групп"""
+    numbers = itertools.count()
+    with temp_database(rows, mode = mode, pool = 2):
+        writes = WriteBehind()
+        results = {'insert': measure(lambda: writes.submit(Game.create, name = f'Game {next(numbers)}', author = 'Bench', year = 2000), repeat = 200)}
+        writes.sync()
+
+        start = time.perf_counter()
+        for _ in range(THREADS * WRITES_PER_THREAD):
+            writes.submit(Game.create, name = f'Game {next(numbers)}', author = 'Bench', year = 2000)
+        writes.sync()
+        results['throughput'] = THREADS * WRITES_PER_THREAD / (time.perf_counter() - start)
+        writes.close()
+    return results
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    for mode in MODES:
+        report(f"writes, {mode}, {rows} games", bench_single(mode, rows))
+        report(f"writes, {mode}, {THREADS} threads", {'throughput': bench_threads(mode, rows)}, unit = 'rows/s')
+        behind = bench_write_behind(mode, rows)
+        report(f"writes, {mode}, write-behind", {'insert': behind['insert']})
+        report(f"writes, {mode}, write-behind", {'throughput': behind['throughput']}, unit = 'rows/s')
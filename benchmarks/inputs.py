@@ -0,0 +1,62 @@
+"""
+Validation throughput: per-value InputManager.validate / get_input against the batch validate_many
+and the row-wise validate_row against the columnar validate_rows of the import
+Run: python -m benchmarks.inputs [--rows 1000000]
+"""
+import time
+import argparse
+from typing import Callable, Dict, List
+
+from src.inputs import InputManager
+from src.transfer import validate_row, validate_rows
+from benchmarks import synthetic_games, report
+
+COLUMNS = {
+    'int': lambda i: f"{1980 + i % 45}",
+    'float': lambda i: f"{i % 1000},5",
+    'bool': lambda i: ('yes', 'no', 'Y', '0')[i % 4],
+    'intrange': lambda i: f"{1990 + i % 10}-2000",
+    'str': lambda i: f"https://game{i}.com",
+}
+PATTERNS = {'str': r'https?://.+\..+'}
+
+def rate(func: Callable, rows: int) -> float:
+    """Значений в секунду"""
+    start = time.perf_counter()
+    func()
+    return rows / (time.perf_counter() - start)
+
+def bench_columns(rows: int) -> None:
+    for _type, make in COLUMNS.items():
+        values: List[str] = [make(i) for i in range(rows)]
+        kwargs = {'regex_pattern': PATTERNS[_type]} if _type in PATTERNS else {}
+        python_type = {'int': int, 'float': float, 'bool': bool, 'str': str}.get(_type)
+
+        results: Dict[str, float] = {
+            'validate': rate(lambda: [InputManager.validate(value, _type, **kwargs) for value in values], rows),
+            'validate_many': rate(lambda: InputManager.validate_many(values, _type, **kwargs), rows),
+        }
+        if python_type:
+            results['get_input'] = rate(lambda: [
+                InputManager.get_input(python_type, on_error = lambda value, e: None, debug_value = value, **kwargs)
+                for value in values
+            ], rows)
+        report(f"{_type}, {rows} values", results, unit = '1/s')
+        print(f"    speedup vs validate    | {results['validate_many'] / results['validate']:10.2f} x")
+
+def bench_rows(rows: int) -> None:
+    games = [{key: str(value) for key, value in game.items()} for game in synthetic_games(rows)]
+    results = {
+        'validate_row': rate(lambda: [validate_row(game) for game in games], rows),
+        'validate_rows': rate(lambda: validate_rows(games), rows),
+    }
+    report(f"import rows, {rows} rows", results, unit = '1/s')
+    print(f"    speedup                | {results['validate_rows'] / results['validate_row']:10.2f} x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Per-value vs batch validation throughput")
+    parser.add_argument('--rows', type = int, default = 1_000_000)
+    args = parser.parse_args()
+
+    bench_columns(args.rows)
+    bench_rows(args.rows)
@@ -0,0 +1,32 @@
+"""
+Attribute access cost of the locale on the keypress / render hot path
+Run: python -m benchmarks.locale
+"""
+import timeit
+
+from src.context import Localization
+from benchmarks import report
+
+NUMBER = 100_000
+
+def bench_locale() -> None:
+    locale = Localization('en')
+    game_list = locale.game_list
+    add_game = locale.add_game
+
+    cases = {
+        'locale.main':                  lambda: locale.main,
+        'locale.banner':                lambda: locale.banner,
+        'action.selectable':            lambda: game_list.selectable,
+        'action.headers[0]':            lambda: game_list.headers[0],
+        'action.questions[0].text':     lambda: add_game.questions[0].text,
+        'action.missing':               lambda: game_list.missing,
+    }
+    results = {
+        title: timeit.timeit(case, number = NUMBER) / NUMBER * 1e9
+        for title, case in cases.items()
+    }
+    report("locale attribute access", results, unit = 'ns')
+
+if __name__ == "__main__":
+    bench_locale()
@@ -0,0 +1,84 @@
+"""
+Memory held by list and search results: peewee Game models vs GameRow records
+Sizes are measured by tracemalloc as memory retained after the load
+Run: python -m benchmarks.memory [rows ...]
+"""
+import gc
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from peewee import ModelSelect
+
+import main
+from src.cache import QueryCache
+from src.cursor import PageCursor, CandidateCursor
+from src.keyboard import ControlKey
+from src.models import Game, game_rows
+from benchmarks import temp_database, report
+from benchmarks.mvc import Headless
+
+SIZES = (1_000_000,)
+PAGES = 128
+BULK = 100_000
+
+class ModelCursor(PageCursor):
+    """PageCursor with pages of full Game models, as before GameRow"""
+    def fetch(self, query: ModelSelect) -> List[Any]:
+        return list(query)
+
+def retained(load: Callable[[], Any]) -> float:
+    """Память в KB, которую занимает результат load()"""
+    gc.collect()
+    tracemalloc.start()
+    value = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size / 1024
+
+def cached_pages(cursor_type: type) -> Callable[[], Any]:
+    """Страницы списка всех игр, которые держит кэш результатов"""
+    def load():
+        cache = QueryCache(size = PAGES + 2)
+        cursor = cursor_type(Game.select(), rows = 5, cache = cache, key = cursor_type.__name__)
+        for number in range(1, PAGES + 1):
+            cursor.page(number)
+        return cache
+    return load
+
+def bench_memory(rows: int) -> Dict[str, float]:
+    results = {}
+    with temp_database(rows):
+        results[f'{PAGES} cached pages, models'] = retained(cached_pages(ModelCursor))
+        results[f'{PAGES} cached pages, rows'] = retained(cached_pages(PageCursor))
+
+        prefix = Game.select().where(Game.name.startswith('Dark')).order_by(Game.name).limit(1000)
+        results['1000 candidates, models'] = retained(lambda: list(prefix))
+        results['1000 candidates, rows'] = retained(lambda: CandidateCursor.search('Dark', rows = 5))
+
+        bulk = Game.select().limit(BULK)
+        results[f'{BULK} games, models'] = retained(lambda: list(bulk))
+        results[f'{BULK} games, rows'] = retained(lambda: game_rows(bulk))
+
+        # курсор и таблица списка освобождаются при выходе в меню
+        app = Headless()
+        gc.collect()
+        tracemalloc.start()
+        app.open('main', 3)
+        for _ in range(PAGES):
+            app.press(ControlKey.RIGHT)
+        main.results.invalidate()
+        results['game_list open'] = tracemalloc.get_traced_memory()[0] / 1024
+        app.press(ControlKey.ESC)
+        gc.collect()
+        results['game_list after esc'] = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+        app.close()
+
+    report(f"memory, {rows} games", results, unit = 'KB')
+    return results
+
+if __name__ == "__main__":
+    for rows in [int(arg) for arg in sys.argv[1:]] or SIZES:
+        bench_memory(rows)
@@ -0,0 +1,151 @@
+"""
+Hot paths of the MVC loop, driven headlessly: output goes to devnull,
+keys are injected as KeyEvent and inputs as debug_value of InputManager
+Run: python -m benchmarks.mvc [rows ...] [--update] [--threshold 0.25]
+Results are compared with the JSON baseline, the run fails on regressions
+The baseline is per machine (gitignored): the first run or --update records it
+"""
+import os
+import sys
+import asyncio
+import argparse
+from typing import Dict
+
+import main
+from src.inputs import InputManager, IntRange
+from src.keyboard import KeyEvent, ControlKey
+from src.render import FrameRenderer
+from src.mvc import GameController, GameView
+from benchmarks import temp_database, measure, report, load_baseline, save_baseline, regressions
+
+SIZES = (1_000, 10_000, 100_000)
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+THRESHOLD = 0.25
+
+FIND_CASES = {
+    'exact name':   dict(name = 'Dark Souls 42', author = '', year = ''),
+    'prefix name':  dict(name = 'Dark Souls 4*', author = '', year = ''),
+    'contains':     dict(name = '*uls 4*', author = '', year = ''),
+    'year range':   dict(name = '', author = '', year = '1990-1991'),
+}
+
+class Headless:
+    """MVC from main.py with stubbed terminal"""
+    def __init__(self, language: str = 'en') -> None:
+        self.controller: GameController = main.game_controller
+        self.view: GameView = main.game_view
+        self.model = main.game_model
+        self.cxt = main.cxt
+
+        self.view.renderer = FrameRenderer(stream = open(os.devnull, 'w', encoding = 'utf-8'))
+        self.loop = asyncio.new_event_loop()
+        # кэш результатов мог остаться от предыдущей базы
+        main.results.invalidate()
+        self.controller.set_locale(main.languages.load(language))
+        self.controller.set_action(self.cxt.locale.main)
+
+    def press(self, key: str) -> None:
+        """Нажатие клавиши и отрисовка кадра, как в GameView.run_loop"""
+        self.loop.run_until_complete(self.controller.press_keys([KeyEvent(key, '')]))
+        self.view.show()
+
+    def type(self, text: str) -> None:
+        """Ввод значения на странице ввода, как в GameController.request_input"""
+        question = self.cxt.action.questions[self.cxt.context.memory.step]
+        # пустая строка проверяется так же, как пустой ввод (debug_value is None - только чтение stdin)
+        t = {'int': int, 'str': str, 'range': IntRange}[question.type]
+        value = InputManager.get_input(t, lambda v, err: (v, err), debug_value = text)
+        self.controller.input_value(value, question)
+
+    def open(self, page: str, button: int) -> None:
+        """Перейти со страницы page нажатием кнопки button"""
+        self.controller.set_action(getattr(self.cxt.locale, page))
+        self.model.current_button = button
+        self.controller.call_navigator()
+        self.view.show()
+
+    def fill(self, page: str, values: Dict[str, str]) -> None:
+        """Заполнить все вопросы страницы ввода, последний вызывает валидатор"""
+        self.controller.set_action(getattr(self.cxt.locale, page))
+        for question in self.cxt.action.questions:
+            self.type(values[question.name])
+
+    def close(self) -> None:
+        self.view.renderer.stream.close()
+        self.loop.close()
+
+def bench_mvc(rows: int) -> Dict[str, float]:
+    results = {}
+    with temp_database(rows):
+        app = Headless()
+
+        # keypress -> frame на странице списка
+        app.open('main', 3)
+        keys = iter([ControlKey.DOWN, ControlKey.UP] * 100)
+        results['keypress select -> frame'] = measure(lambda: app.press(next(keys)), repeat = 200)
+        results['keypress page -> frame'] = measure(lambda: app.press(ControlKey.RIGHT), repeat = 100)
+
+        # подготовка таблицы страницы списка
+        prepare = app.controller.router.preparations['horizontal']
+        cursor = app.cxt.context.memory.cursor
+        pages = iter([1, 2] * 100)
+        def flip():
+            app.model.current_page = next(pages)
+            prepare(app.view)
+        results['horizontal prep, next page'] = measure(flip, repeat = 200)
+
+        def jump():
+            # курсор без известных границ страниц и пустой кэш - переход в середину списка
+            main.results.invalidate()
+            cursor.bounds, cursor.current_page = {0: None}, None
+            app.model.current_page = cursor.max_page // 2
+            prepare(app.view)
+        results['horizontal prep, middle page'] = measure(jump, repeat = 20)
+
+        # валидаторы страниц ввода
+        def find(values: Dict[str, str]) -> None:
+            main.results.invalidate()
+            app.fill('find_game', values)
+        for title, values in FIND_CASES.items():
+            results[f'find_game {title}'] = measure(lambda: find(values), repeat = 20)
+        # повторный поиск - из кэша результатов
+        results['find_game repeated'] = measure(lambda: app.fill('find_game', FIND_CASES['contains']), repeat = 20)
+
+        # поиск по мере ввода: запрос по индексу name и уточнение кандидатов следующим символом
+        live = app.controller.router.live_search('quick_search')
+        results['quick_search query'] = measure(lambda: live(app.controller, 'Dark Souls 4', None), repeat = 50)
+        candidates = live(app.controller, 'Dark Souls 4', None)
+        results['quick_search next char'] = measure(lambda: live(app.controller, 'Dark Souls 42', candidates), repeat = 50)
+
+        numbers = iter(range(10 ** 9))
+        results['add_game'] = measure(
+            lambda: app.fill('add_game', dict(name = f'Bench {next(numbers)}', author = 'Bench', year = '2000')),
+            repeat = 50
+        )
+        app.close()
+
+    report(f"mvc, {rows} games", results)
+    return {f"{rows}/{name}": value for name, value in results.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "MVC benchmarks with regression check")
+    parser.add_argument('rows', type = int, nargs = '*', default = SIZES, help = "catalog sizes")
+    parser.add_argument('--baseline', default = BASELINE, help = "JSON file with previous results")
+    parser.add_argument('--threshold', type = float, default = THRESHOLD, help = "allowed slowdown, 0.25 = +25%%")
+    parser.add_argument('--update', action = 'store_true', help = "save results as the new baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.rows:
+        results.update(bench_mvc(rows))
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None or args.update:
+        save_baseline(args.baseline, {**(baseline or {}), **results})
+        print(f"[BENCH] baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    slower = regressions(results, baseline, args.threshold)
+    for line in slower:
+        print(f"[REGRESSION] {line}")
+    sys.exit(1 if slower else 0)
@@ -0,0 +1,55 @@
+"""
+Redraw cost of the differential frame renderer
+Run: python -m benchmarks.render
+"""
+import io
+import timeit
+
+from src.context import Localization
+from src.render import FrameRenderer
+from benchmarks import report
+
+NUMBER = 10_000
+
+def game_list_frame(locale: Localization, page: int, button: int) -> str:
+    """Frame of game_list page like GameView.show builds it"""
+    page_config = locale.game_list
+    rows = "\n".join(
+        page_config.single_row.render(
+            cols = f" {(page - 1) * 5 + i} | Game {page}-{i} | Publisher | 2000 ",
+            select = 1 if i == button else 0
+        )
+        for i in range(1, 6)
+    )
+    text = page_config.template.render(dict(games = 100, page = page, max_page = 20, table_header = 'header', rows = rows))
+    return locale.banner + '\n' + text
+
+def bench_render() -> None:
+    locale = Localization('en')
+    frames = {
+        'move selector': [game_list_frame(locale, 1, button) for button in (1, 2)],
+        'flip page':     [game_list_frame(locale, page, 1) for page in (1, 2)],
+    }
+
+    times, sizes = {}, {}
+    for title, (first, second) in frames.items():
+        renderer = FrameRenderer(stream = io.StringIO())
+        renderer.render(first)
+        state = {'frame': 0}
+        def redraw():
+            state['frame'] ^= 1
+            sizes[title] = len(renderer.render((first, second)[state['frame']]))
+        times[title] = timeit.timeit(redraw, number = NUMBER) / NUMBER * 1e6
+
+    # полная перерисовка - как раньше после очистки консоли
+    renderer = FrameRenderer(stream = io.StringIO())
+    def full():
+        renderer.invalidate()
+        sizes['full redraw'] = len(renderer.render(frames['flip page'][0]))
+    times['full redraw'] = timeit.timeit(full, number = NUMBER) / NUMBER * 1e6
+
+    report("frame redraw time", times, unit = 'us')
+    report("frame redraw size", sizes, unit = 'bytes')
+
+if __name__ == "__main__":
+    bench_render()
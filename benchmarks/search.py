@@ -0,0 +1,44 @@
+"""
+Search latency on catalogs of different size
+Run: python -m benchmarks.search [rows ...]
+"""
+import sys
+
+from src.cursor import search_cursor
+from src.inputs import IntRange
+from src.search import GameSearch
+from benchmarks import temp_database, measure, report
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+CASES = {
+    'exact name':        dict(name = 'Dark Souls 4242'),
+    'prefix name':       dict(name = 'Dark Souls 42*'),
+    'contains name':     dict(name = '*uls 42*'),
+    'contains author':   dict(author = '*Projekt 7*'),
+    'short contains':    dict(name = '*42*'),
+    'author + year':     dict(author = 'Valve 42', year = 2004),
+    'year range':        dict(year = IntRange(1990, 1991)),
+    'fuzzy name':        dict(name = '~Drak Suols 4242'),
+    'fuzzy common word': dict(name = '~сталкре'),
+    'fuzzy author':      dict(author = '~Valev 42'),
+}
+
+def first_page(search: GameSearch) -> None:
+    """What find_game does: count results and load the first page"""
+    cursor = search_cursor(search, rows = 5)
+    cursor.count
+    cursor.page(1)
+
+def bench_search(rows: int) -> None:
+    with temp_database(rows):
+        results = {}
+        for title, filters in CASES.items():
+            search = GameSearch(**filters)
+            results[f"{title} ({search.plan})"] = measure(lambda: first_page(search), repeat = 5)
+        report(f"search, {rows} games", results)
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    for size in sizes:
+        bench_search(size)
@@ -0,0 +1,118 @@
+"""
+Load test of the telnet server (server.py): many concurrent sessions browse the game list
+Latency of a keystroke = from sending the key to the end of the frame it causes
+Run: python -m benchmarks.server [--sessions 200] [--keys 50] [--rows 100000]
+Without --port the server is started in a subprocess on a temporary database
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+
+from src.render import HIDE_CURSOR
+from src.stats import RingBuffer
+from benchmarks import temp_database, report
+
+ROOT = __file__.rsplit('benchmarks', 1)[0]
+# кадр страницы без ввода заканчивается скрытием курсора
+FRAME_END = HIDE_CURSOR.encode()
+
+class Session:
+    """One telnet client, every key waits for its frame"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latencies: RingBuffer) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+
+    async def frame(self) -> None:
+        data = b''
+        while FRAME_END not in data:
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                raise ConnectionError("server closed the session")
+            data += chunk
+
+    async def press(self, key: bytes) -> None:
+        start = time.perf_counter()
+        self.writer.write(key)
+        await self.frame()
+        self.latencies.add((time.perf_counter() - start) * 1000)
+
+async def run_session(host: str, port: int, keys: int, latencies: RingBuffer) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    session = Session(reader, writer, latencies)
+    await session.frame()
+
+    # первый язык, "Все игры", листание страниц и выбор строк, выход в меню
+    for key in (b'\r', b's', b's', b'\r'):
+        await session.press(key)
+    for i in range(keys):
+        await session.press(b's' if i % 3 else b'd')
+    await session.press(b'\x1b')
+    writer.close()
+
+async def load(host: str, port: int, sessions: int, keys: int) -> RingBuffer:
+    latencies = RingBuffer(sessions * (keys + 5))
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(host, port, keys, latencies) for _ in range(sessions)))
+    seconds = time.perf_counter() - start
+
+    p50, p95, p99 = latencies.percentiles(50, 95, 99)
+    report(f"server, {sessions} sessions x {keys + 5} keys", {
+        'keystroke p50': p50,
+        'keystroke p95': p95,
+        'keystroke p99': p99,
+        'keystroke max': max(latencies),
+    })
+    report("throughput", {'keystrokes': len(latencies) / seconds}, unit = '1/s')
+    return latencies
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout = 1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+def start_server(path: str, port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, 'server.py', '--port', str(port), '--workers', str(workers)],
+        cwd = ROOT, env = {**os.environ, 'GAMES_DB': path},
+        stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Load test of the telnet server")
+    parser.add_argument('--sessions', type = int, default = 200)
+    parser.add_argument('--keys', type = int, default = 50, help = "keystrokes on the game list per session")
+    parser.add_argument('--rows', type = int, default = 100_000, help = "games in the temporary database")
+    parser.add_argument('--workers', type = int, default = 8, help = "handler threads of the started server")
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, help = "running server, by default a new one is started")
+    args = parser.parse_args()
+
+    if args.port:
+        asyncio.run(load(args.host, args.port, args.sessions, args.keys))
+        sys.exit(0)
+
+    with temp_database(args.rows) as database:
+        port = free_port()
+        server = start_server(database.database, port, args.workers)
+        try:
+            wait_port(port)
+            asyncio.run(load('127.0.0.1', port, args.sessions, args.keys))
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,79 @@
+"""
+Startup time: import of main.py and the first frame (language selection page)
+Every run is a new interpreter, import time is taken from python -X importtime
+The run fails when import of main exceeds the budget or loads modules
+that must be imported only on first use (database, logging, yaml)
+Run: python -m benchmarks.startup [--budget 150] [--runs 5]
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+from benchmarks import report
+
+ROOT = __file__.rsplit('benchmarks', 1)[0]
+BUDGET = 150.0
+RUNS = 5
+
+# не должны загружаться при импорте main
+LAZY = ('peewee', 'playhouse', 'sqlite3', 'loguru', 'yaml', 'src.models', 'src.cursor', 'src.search', 'src.table')
+
+FIRST_FRAME = """
+import os, time
+start = time.perf_counter()
+import main
+from src.context import Localization
+from src.render import FrameRenderer
+main.game_view.renderer = FrameRenderer(stream = open(os.devnull, 'w', encoding = 'utf-8'))
+main.cxt.locale = Localization('all')
+main.game_controller.set_locale(main.cxt.locale)
+main.game_controller.set_action(main.cxt.locale.select_language)
+main.game_view.show()
+print((time.perf_counter() - start) * 1000)
+"""
+
+def python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd = ROOT, capture_output = True, text = True, check = True)
+
+def import_times() -> Dict[str, Tuple[float, float]]:
+    """Модуль -> (своё время, с вложенными импортами) в мс для import main"""
+    times = {}
+    for line in python('-X', 'importtime', '-c', 'import main').stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own) / 1000, int(cumulative) / 1000)
+    return times
+
+def bench_startup(runs: int) -> Tuple[Dict[str, float], List[str], Dict[str, Tuple[float, float]]]:
+    imports = [import_times() for _ in range(runs)]
+    frames = [float(python('-c', FIRST_FRAME).stdout.split()[-1]) for _ in range(runs)]
+
+    results = {
+        'import main': statistics.median(times['main'][1] for times in imports),
+        'import + first frame': statistics.median(frames),
+    }
+    lazy = sorted({name for times in imports for name in times if name in LAZY})
+    return results, lazy, imports[-1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Startup time with budget check")
+    parser.add_argument('--budget', type = float, default = BUDGET, help = "max import time of main, ms")
+    parser.add_argument('--runs', type = int, default = RUNS, help = "interpreter runs, median is used")
+    args = parser.parse_args()
+
+    results, lazy, times = bench_startup(args.runs)
+    report("startup", results)
+    slowest = sorted(times.items(), key = lambda item: item[1][0], reverse = True)[:8]
+    report("slowest modules (own time)", {name: own for name, (own, _) in slowest})
+
+    failed = False
+    if results['import main'] > args.budget:
+        print(f"[BUDGET] import main {results['import main']:.1f} ms > {args.budget:.1f} ms")
+        failed = True
+    if lazy:
+        print(f"[BUDGET] loaded on import, expected on first use: {', '.join(lazy)}")
+        failed = True
+    sys.exit(1 if failed else 0)
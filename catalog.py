@@ -0,0 +1,58 @@
+import argparse
+
+from loguru import logger
+
+from src.transfer import (
+    TransferStats, detect_format, open_file, 
+    read_rows, import_games, export_games, CSV, JSONL
+)
+
+# # # # # # # # # # # # # # # # # # # # #
+#                                       #
+#      Bulk import / export of games    #
+#                                       #
+# # # # # # # # # # # # # # # # # # # # #
+# python catalog.py import games.csv    #
+# python catalog.py export games.jsonl  #
+# # # # # # # # # # # # # # # # # # # # #
+
+def progress(stats: TransferStats):
+    logger.info(f"{stats.rows} rows | {stats.rate:,.0f} rows/s")
+
+def run_import(args: argparse.Namespace):
+    fmt = args.format or detect_format(args.path)
+    with open_file(args.path, 'r') as f:
+        stats = import_games(read_rows(f, fmt), batch_size = args.batch, on_batch = progress)
+
+    for number, error in stats.errors[:20]:
+        logger.warning(f"row {number}: {error}")
+    logger.success(f"Imported {stats.rows} games, skipped {len(stats.errors)} rows "
+                   f"in {stats.seconds:.2f}s ({stats.rate:,.0f} rows/s)")
+
+def run_export(args: argparse.Namespace):
+    fmt = args.format or detect_format(args.path)
+    with open_file(args.path, 'w') as f:
+        stats = export_games(f, fmt, on_batch = progress)
+
+    logger.success(f"Exported {stats.rows} games in {stats.seconds:.2f}s ({stats.rate:,.0f} rows/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Bulk import / export of the games catalog")
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    importer = commands.add_parser('import', help = "load games from csv / jsonl")
+    importer.add_argument('path', help = "file path, '-' for stdin")
+    importer.add_argument('--format', choices = (CSV, JSONL), help = "by default from file extension")
+    importer.add_argument('--batch', type = int, default = 5000, help = "rows per transaction")
+    importer.set_defaults(handler = run_import)
+
+    exporter = commands.add_parser('export', help = "dump all games to csv / jsonl")
+    exporter.add_argument('path', help = "file path, '-' for stdout")
+    exporter.add_argument('--format', choices = (CSV, JSONL), help = "by default from file extension")
+    exporter.set_defaults(handler = run_export)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,57 @@
-from loguru import logger
+from __future__ import annotations
 
-from src.models import Game
-from src.context import Localization
-from src.utils import set_console_size
+import os
+import asyncio
+from typing import TYPE_CHECKING
+
+from src.cache import QueryCache
+from src.context import Localization, LanguageRegistry
 from src.exceptions import *
+from src.stats import FrameStats
+from src.writer import WriteBehind
+
+if TYPE_CHECKING:
+    # только для аннотаций, при запуске модели и курсоры импортируются в обработчиках
+    from src.models import Game, GameRow
+    from src.cursor import CandidateCursor, FacetCursor, PageCursor
 from src.mvc import ContextStorage, GameModel, GameController, GameView
 
-# set standart console size
-set_console_size(70, 41)
+# Импорт main ничего не читает и не открывает: локализация загружается в main(),
+# база (peewee, src.models, src.cursor ...) - в первом обработчике, которому она нужна
+
+# installed languages, packs are loaded on select
+languages = LanguageRegistry()
+
+# results of find_game / game_list, reset on every write
+results = QueryCache()
+
+# GAMES_WRITE_BEHIND=1 - добавление / изменение / удаление через очередь записи с групповыми транзакциями,
+# чтение через results сначала дожидается записи очереди
+writes = WriteBehind(on_flush = results.invalidate) if os.environ.get('GAMES_WRITE_BEHIND') else None
+if writes is not None:
+    results.before_read = writes.sync
 
-# load locale for select language
-locale = Localization('all')
+def write(func, *args, **kwargs):
+    """Записать сразу или через очередь записи"""
+    if writes is None:
+        func(*args, **kwargs)
+        results.invalidate()
+    else:
+        writes.submit(func, *args, **kwargs)
+
+def sync_writes():
+    """Чтение мимо results должно видеть свои записи"""
+    if writes is not None:
+        writes.sync()
 
-# load context
-cxt = ContextStorage(locale)
+# load context, locale for select language is loaded in main()
+cxt = ContextStorage(None)
 
 # load MVC (Model, View, Controller)
 game_model = GameModel(cxt)
-game_controller = GameController(cxt, game_model)
+# GAMES_STATS=1 - замеры времени обработчиков, строка статистики по клавише ` / ё
+stats = FrameStats() if os.environ.get('GAMES_STATS') else None
+game_controller = GameController(cxt, game_model, stats = stats)
 game_view = GameView(cxt, game_model, game_controller)
 
 
@@ -36,7 +70,7 @@ game_view = GameView(cxt, game_model, game_controller)
 @game_controller.navigator(page_from = 'select_language', buttons = [])
 def add_game(ctrl: GameController):
     lang = ctrl.cxt.context.memory.langs[ctrl.model.current_button - 1]
-    ctrl.cxt.locale = lang
+    ctrl.set_locale(languages.load(lang.language))
     ctrl.set_action(ctrl.cxt.locale.main)
 
 @game_controller.navigator(page_from = 'main', buttons = [1])
@@ -49,39 +83,102 @@ def find_game(ctrl: GameController):
 
 @game_controller.navigator(page_from = 'main', buttons = [3])
 def game_list(ctrl: GameController):
-    games = list(Game.select())
-    if games:
-        ctrl.cxt.context.memory.games = list(Game.select())
+    from src.cursor import search_cursor
+    from src.search import GameSearch
+    # все игры - поиск без фильтров
+    cursor = search_cursor(GameSearch(), rows = ctrl.cxt.locale.game_list.rows, cache = results)
+    if cursor.count:
+        ctrl.cxt.context.memory.cursor = cursor
         ctrl.set_action(ctrl.cxt.locale.game_list)
     else:
         ctrl.cxt.context.storage.status = ctrl.cxt.action.no_games
 
+def open_facets(ctrl: GameController, model, page):
+    from src.cursor import FacetCursor
+    # счётчики берутся из таблицы, которую поддерживают триггеры, а не из game
+    facets = FacetCursor(model, rows = page.rows, cache = results)
+    if facets.count:
+        ctrl.cxt.context.memory.facets = facets
+        ctrl.set_action(page)
+    else:
+        ctrl.cxt.context.storage.status = ctrl.cxt.action.no_games
+
+@game_controller.navigator(page_from = 'main', buttons = [4])
+def authors(ctrl: GameController):
+    from src.models import AuthorFacet
+    open_facets(ctrl, AuthorFacet, ctrl.cxt.locale.authors)
+
+@game_controller.navigator(page_from = 'main', buttons = [5])
+def years(ctrl: GameController):
+    from src.models import YearFacet
+    open_facets(ctrl, YearFacet, ctrl.cxt.locale.years)
+
+@game_controller.navigator(page_from = 'main', buttons = [6])
+def quick_search(ctrl: GameController):
+    # новый запрос с пустой строки
+    ctrl.cxt.context.memory.update(query = '', live = None)
+    ctrl.set_action(ctrl.cxt.locale.quick_search)
+
+@game_controller.navigator(page_from = 'authors', buttons = []) # any button
+@game_controller.navigator(page_from = 'years', buttons = []) # any button
+def facet_games(ctrl: GameController):
+    from src.cursor import search_cursor
+    # игры выбранного издателя / года открываются в game_list
+    facets: FacetCursor = ctrl.cxt.context.memory.facets
+    facet = facets.page(ctrl.model.current_page)[ctrl.model.current_button - 1]
+    ctrl.cxt.context.memory.cursor = search_cursor(facets.search(facet), rows = ctrl.cxt.locale.game_list.rows, cache = results)
+    ctrl.set_action(ctrl.cxt.locale.game_list)
+
 
 @game_controller.navigator(page_from = 'game_list', buttons = []) # any button
 def game_list_buttons(ctrl: GameController):
-    game_index = (ctrl.cxt.action.rows * (ctrl.model.current_page - 1)) + ctrl.model.current_button - 1
-    game: Game = ctrl.cxt.context.memory.games[game_index]
-    ctrl.cxt.context.memory.current_game = game
+    # выбранная игра берётся из текущей страницы курсора
+    page_games = ctrl.cxt.context.memory.cursor.page(ctrl.model.current_page)
+    game: GameRow = page_games[ctrl.model.current_button - 1]
+    open_game(ctrl, game, ctrl.cxt.locale.game_list)
+
+@game_controller.navigator(page_from = 'quick_search', buttons = []) # any button
+def quick_search_buttons(ctrl: GameController):
+    candidates: CandidateCursor = ctrl.cxt.context.memory.live
+    if candidates is None or not candidates.count:
+        return
+    game: GameRow = candidates.page(ctrl.model.current_page)[ctrl.model.current_button - 1]
+    open_game(ctrl, game, ctrl.cxt.locale.quick_search)
+
+def open_game(ctrl: GameController, game: GameRow, back):
+    ctrl.cxt.context.storage.status = ''
+    ctrl.cxt.context.memory.update(current_game = game, back = back)
     ctrl.cxt.context.set_storage(name = game.name, author = game.author, year = game.year)
 
     ctrl.set_action(ctrl.cxt.locale.game_page)
 
 @game_controller.navigator(page_from = 'game_page', buttons = [1])
 def game_page_edit(ctrl: GameController):
+    from src.models import Game
+    # модель со всем состоянием peewee нужна только для сохранения изменений
+    sync_writes()
+    try:
+        game: Game = ctrl.cxt.context.memory.current_game.instance()
+    except Game.DoesNotExist:
+        # игру удалили после загрузки списка: другая сессия, API или очередь записи
+        ctrl.cxt.context.storage.status = ctrl.cxt.action.not_found
+        ctrl.set_action(ctrl.cxt.context.memory.get('back') or ctrl.cxt.locale.game_list)
+        return
     ctrl.set_action(ctrl.cxt.locale.edit_game)
-    game: Game = ctrl.cxt.context.memory.current_game
-    ctrl.cxt.context.memory.update(name = game.name, author = game.author, year = game.year)
+    ctrl.cxt.context.memory.update(game = game, name = game.name, author = game.author, year = game.year)
 
 @game_controller.navigator(page_from = 'game_page', buttons = [2])
 def game_page_delete(ctrl: GameController):
+    from src.models import Game
     ctrl.cxt.context.storage.status = ctrl.cxt.action.delete # delete
-    game: Game = ctrl.cxt.context.memory.current_game
-    game.delete_instance()
+    game: GameRow = ctrl.cxt.context.memory.current_game
+    write(Game.delete_by_id, game.id)
     ctrl.set_action(ctrl.cxt.locale.main) # to menu
 
 @game_controller.navigator(page_from = 'game_page', buttons = [3])
 def game_page_menu(ctrl: GameController):
-    ctrl.set_action(ctrl.cxt.locale.game_list) # back
+    # назад к списку или к поиску по мере ввода, откуда открыта игра
+    ctrl.set_action(ctrl.cxt.context.memory.get('back') or ctrl.cxt.locale.game_list)
 
 
 
@@ -100,52 +197,71 @@ def game_page_menu(ctrl: GameController):
 
 @game_controller.input_validator(on_page = "add_game")
 def add_game_validator(ctrl: GameController):
+    from src.models import Game
     # Сохранить игру в бд
-    game = Game(
+    write(Game.create,
         name = ctrl.cxt.context.memory.name, 
         author = ctrl.cxt.context.memory.author, 
         year = ctrl.cxt.context.memory.year)
-    game.save()
 
     ctrl.cxt.context.storage.status = ctrl.cxt.action.success
     ctrl.set_action(ctrl.cxt.locale.main)
 
 @game_controller.input_validator(on_page = "find_game")
 def find_game_validator(ctrl: GameController):
+    from src.cursor import search_cursor
+    from src.search import GameSearch
     # если игры не найдены в статус поставить что нет таких и вернуть в меню
     # если найдены отправить на страницы с играми
-    query = Game.select()
-
-    if ctrl.cxt.context.memory.name:
-        query = query.where(Game.name == ctrl.cxt.context.memory.name)
-    if ctrl.cxt.context.memory.author:
-        query = query.where(Game.author == ctrl.cxt.context.memory.author)
-    if ctrl.cxt.context.memory.year:
-        query = query.where(Game.year == ctrl.cxt.context.memory.year)
+    search = GameSearch(
+        name = ctrl.cxt.context.memory.name,
+        author = ctrl.cxt.context.memory.author,
+        year = ctrl.cxt.context.memory.year)
     
-    result = list(query)
-    if not result:
+    cursor = search_cursor(search, rows = ctrl.cxt.locale.game_list.rows, cache = results)
+    if not cursor.count:
         ctrl.cxt.context.storage.status = ctrl.cxt.action.error
         ctrl.set_action(ctrl.cxt.locale.main)
         return
     else:
-        ctrl.cxt.context.memory.games = result
+        ctrl.cxt.context.memory.cursor = cursor
         ctrl.set_action(ctrl.cxt.locale.game_list)
 
 @game_controller.input_validator(on_page = "edit_game")
 def edit_game_validator(ctrl: GameController):
     # изменение игры
-    game: Game = ctrl.cxt.context.memory.current_game
+    game: Game = ctrl.cxt.context.memory.game
     game.name = ctrl.cxt.context.memory.name if ctrl.cxt.context.memory.name else game.name
     game.author = ctrl.cxt.context.memory.author if ctrl.cxt.context.memory.author else game.author
     game.year = ctrl.cxt.context.memory.year if ctrl.cxt.context.memory.year else game.year
-    game.save()
+    write(game.save)
 
     ctrl.cxt.context.storage.status = ctrl.cxt.action.success
     ctrl.set_action(ctrl.cxt.locale.main)
 
 
 
+# # # # # # # # # # # # # # # # # # # # #
+#                                       #
+#                                       #
+#             LIVE SEARCHES             #
+#                                       #
+#                                       #
+# # # # # # # # # # # # # # # # # # # # # 
+#    searches while the user types      #
+# # # # # # # # # # # # # # # # # # # # # 
+
+
+
+@game_controller.live_search(on_page = "quick_search")
+def quick_search_live(ctrl: GameController, text: str, previous: CandidateCursor) -> CandidateCursor:
+    from src.cursor import CandidateCursor
+    sync_writes()
+    # новый символ уточняет кандидатов прошлого запроса, без запроса к базе, если их не слишком много
+    return CandidateCursor.search(text.lstrip(), rows = ctrl.cxt.locale.quick_search.rows, previous = previous)
+
+
+
 # # # # # # # # # # # # # # # # # # # # #
 #                                       #
 #                                       #
@@ -160,7 +276,7 @@ def edit_game_validator(ctrl: GameController):
 @game_view.view_preparation('selectable')
 def selectable_view_preparation(view: GameView):
     if view.cxt.action.name == 'select_language':
-        langs = Localization.get_languages()
+        langs = languages.languages
         view.model.max_button = len(langs)
         view.cxt.context.memory.langs = langs
 
@@ -168,54 +284,56 @@ def selectable_view_preparation(view: GameView):
 
         for i, lang in enumerate(langs):
             rows.append(
-                view.cxt.locale.select_language.lang_row
-                .replace('{i}', str(i + 1),)
-                .replace('{language}', lang.lang_name if lang.lang_name else lang.language)
-                # lang_name from file, is not specified, just language as EN, RU, etc.
+                view.cxt.action.lang_row.render(
+                    i = i + 1,
+                    # lang_name from file, is not specified, just language as EN, RU, etc.
+                    language = lang.lang_name if lang.lang_name else lang.language,
+                    select = 1 if i + 1 == view.model.current_button else 0
+                )
             )
-        rows = "\n".join(rows)
-        view.cxt.context.text = view.cxt.context.text.replace('{rows}', rows)
+        view.cxt.context.set_storage(rows = "\n".join(rows))
 
 @game_view.view_preparation('horizontal')
 def horizontal_view_preparation(view: GameView):
-    max_page = len(view.cxt.context.memory.games) // view.cxt.action.rows + (1 if len(view.cxt.context.memory.games) % view.cxt.action.rows > 0 else 0)
-    view.model.max_page = max_page
+    from src.table import Table
+    # страницы издателей / годов листают счётчики, поиск по мере ввода - кандидатов, остальные - игры
+    if view.cxt.action.live:
+        cursor: PageCursor = view.cxt.context.memory.live
+        if cursor is None:
+            # запрос ещё не набран
+            view.model.max_page = view.model.max_button = 1
+            view.cxt.context.set_storage(page = 1, max_page = 1, games = 0, table_header = '', rows = '')
+            return
+    elif view.cxt.action.facet:
+        cursor = view.cxt.context.memory.facets
+    else:
+        cursor = view.cxt.context.memory.cursor
+    view.model.max_page = cursor.max_page
     view.cxt.context.set_storage(
         page = view.model.current_page,
         max_page = view.model.max_page,
-        games = len(view.cxt.context.memory.games),
+        games = cursor.count,
     )
-    # build table
-    page_games = view.cxt.context.memory.games[(view.model.current_page - 1) * view.cxt.action.rows:view.model.current_page * view.cxt.action.rows]
-    view.model.max_button = len(page_games)
-    i_length = len(view.cxt.action.headers[0]) + 2
-    name_length = max([len(game.name) for game in page_games] + [len(view.cxt.action.headers[1])]) + 2
-    author_length = max([len(game.author) for game in page_games] + [len(view.cxt.action.headers[2])]) + 2
-    year_length = max([len(str(game.year)) for game in page_games] + [len(view.cxt.action.headers[3])]) + 2
-    
-    table_header = "|".join([
-        view.cxt.action.headers[0].center(i_length),
-        view.cxt.action.headers[1].center(name_length),
-        view.cxt.action.headers[2].center(author_length),
-        view.cxt.action.headers[3].center(year_length),
-    ])
-    rows = []
-    for i, game in enumerate(page_games):
-        row = "|".join([
-            str((view.cxt.action.rows * (view.model.current_page - 1)) + (i + 1)).center(i_length),
-            str(game.name).center(name_length),
-            str(game.author).center(author_length),
-            str(game.year).center(year_length),
-        ])
-        full_row = view.cxt.action.single_row.replace('{cols}', row)
-        rows.append(full_row)
-    
-    rows = "\n".join(rows)
-    view.cxt.context.text = view.cxt.context.text.replace('{rows}', rows)
+    # ширина колонок общая для всех страниц результата, считается один раз
+    table: Table = view.tables.get(cursor)
+    if table is None or table.page is not view.cxt.action:
+        table = view.tables[cursor] = Table(cursor, view.cxt.action)
+
+    # из базы берётся только текущая страница, при смене выбора строки не форматируются заново
+    view.model.max_button = len(cursor.page(view.model.current_page))
     view.cxt.context.set_storage(
-        table_header = table_header,
+        table_header = table.header,
+        rows = table.rows(view.model.current_page, view.model.current_button),
     )
 
+@game_view.view_preparation('live')
+def live_view_preparation(view: GameView):
+    candidates: CandidateCursor = view.cxt.context.memory.live
+    view.cxt.context.set_storage(query = view.cxt.context.memory.query)
+    if candidates is not None and not candidates.complete:
+        # показаны первые кандидаты по алфавиту, остальные - после следующих символов
+        view.cxt.context.set_storage(games = f"{candidates.count}+")
+
 
 
 @game_view.view_preparation('input')
@@ -247,9 +365,18 @@ def input_view_preparation(view: GameView):
 
 
 
-if __name__ == "__main__":
+def main():
+    """Запуск: страница выбора языка, остальное загружается при первом обращении"""
+    cxt.locale = Localization('all')
     try:
-        game_view.run_loop(locale.select_language)
+        asyncio.run(game_view.run_loop(cxt.locale.select_language))
     except Exception as e:
+        from loguru import logger
         logger.exception(e)
         input()
+    finally:
+        if writes is not None:
+            writes.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import asyncio
+import argparse
+
+from loguru import logger
+
+import main
+from src.context import Localization
+from src.server import GameServer
+
+# # # # # # # # # # # # # # # # # # # # #
+#                                       #
+#     Catalog UI for many operators     #
+#                                       #
+# # # # # # # # # # # # # # # # # # # # #
+# python server.py --port 2323          #
+# telnet localhost 2323                 #
+# # # # # # # # # # # # # # # # # # # # #
+
+def run():
+    parser = argparse.ArgumentParser(description = "Telnet server: one catalog UI session per connection")
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 2323)
+    parser.add_argument('--workers', type = int, default = 8, help = "threads for database handlers of all sessions")
+    args = parser.parse_args()
+
+    # обработчики страниц и кэш результатов - из main.py, общие для всех сессий
+    server = GameServer(main.game_controller.router, Localization('all'), workers = args.workers)
+
+    def on_start(listener):
+        for sock in listener.sockets:
+            logger.info(f"Listening on {sock.getsockname()[0]}:{sock.getsockname()[1]}")
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, on_start = on_start))
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+
+if __name__ == "__main__":
+    run()
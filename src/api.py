@@ -0,0 +1,276 @@
+import json
+import base64
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from loguru import logger
+
+from src.cache import QueryCache
+from src.inputs import InputManager
+from src.models import Game, GameRow, GAME_ROW, catalog_version, game_rows
+from src.search import GameSearch
+from src.transfer import validate_row
+from src.exceptions import InputValidationError, ApiError
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10_000
+# размер части ответа при потоковой выдаче списка
+CHUNK_SIZE = 64 * 1024
+
+def game_json(game: GameRow) -> Dict[str, Any]:
+    return game._asdict()
+
+def encode_cursor(kind: str, value: int) -> str:
+    """Непрозрачный курсор следующей страницы: после id или смещение в ранжированном списке"""
+    return base64.urlsafe_b64encode(f'{kind}:{value}'.encode()).decode().rstrip('=')
+
+def decode_cursor(token: str) -> Tuple[str, int]:
+    try:
+        kind, value = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode().split(':')
+        return kind, int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+
+def parse_search(params: Dict[str, str]) -> GameSearch:
+    """Фильтры списка - как на странице find_game: name*, *name*, ~name, год 1990-2000"""
+    year = params.get('year')
+    if year:
+        try:
+            year = InputManager.validate(year, 'intrange')
+        except InputValidationError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid year {year}, expected 1990 or 1990-2000")
+    return GameSearch(name = params.get('name'), author = params.get('author'), year = year or None)
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """
+    JSON API over Game:
+        GET    /games?name=&author=&year=&limit=&cursor=   list / search, streamed
+        GET    /games/<id>
+        POST   /games                                      {"name", "author", "year"}
+        PUT    /games/<id>                                 all fields
+        PATCH  /games/<id>                                 some fields
+        DELETE /games/<id>
+    GET responses carry ETag = version of the catalog data, If-None-Match -> 304
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GamesCatalog/1.0'
+    # общий для всех потоков сервера кэш ранжированных результатов нечёткого поиска
+    results = QueryCache()
+
+    # ROUTING
+    def route(self) -> Tuple[str, Optional[int], Dict[str, str]]:
+        """Путь -> ресурс, id игры, параметры запроса"""
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if not parts or parts[0] != 'games' or len(parts) > 2:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown resource {url.path}")
+        if len(parts) == 1:
+            return 'games', None, params
+        if not parts[1].isdigit():
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown game {parts[1]}")
+        return 'game', int(parts[1]), params
+
+    def dispatch(self, method: str) -> None:
+        # соединение с базой (из пула) только на время запроса: потоки сервера создаются на каждое подключение
+        try:
+            with Game._meta.database.connection_context():
+                resource, game_id, params = self.route()
+                handler = getattr(self, f'{method}_{resource}', None)
+                if handler is None:
+                    raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method.upper()} is not allowed here")
+                if game_id is None:
+                    handler(params)
+                else:
+                    handler(game_id, params)
+        except ApiError as e:
+            self.send_json(e.status, {'error': str(e)})
+        except InputValidationError as e:
+            self.send_json(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            logger.exception(e)
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal error"})
+
+    def do_GET(self): self.dispatch('get')
+    def do_POST(self): self.dispatch('post')
+    def do_PUT(self): self.dispatch('put')
+    def do_PATCH(self): self.dispatch('patch')
+    def do_DELETE(self): self.dispatch('delete')
+
+    # RESPONSES
+    def send_json(self, status: HTTPStatus, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data, ensure_ascii = False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def fresh(self, etag: str) -> bool:
+        """У клиента та же версия данных"""
+        return etag in (tag.strip() for tag in self.headers.get('If-None-Match', '').split(','))
+
+    def not_modified(self, etag: str) -> bool:
+        """Ответить 304, если у клиента та же версия данных"""
+        if not self.fresh(etag):
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return True
+
+    def stream_json(self, parts: Iterable[str], etag: str) -> None:
+        """Ответ частями (chunked) по мере чтения из базы, без сборки всего списка в памяти"""
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('ETag', etag)
+        self.end_headers()
+
+        buffer = []
+        size = 0
+        for part in parts:
+            buffer.append(part)
+            size += len(part)
+            if size >= CHUNK_SIZE:
+                self.write_chunk(''.join(buffer))
+                buffer, size = [], 0
+        if buffer:
+            self.write_chunk(''.join(buffer))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_chunk(self, text: str) -> None:
+        data = text.encode('utf-8')
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+    def read_json(self) -> Dict[str, Any]:
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return data
+
+    @staticmethod
+    def etag(version: int) -> str:
+        return f'"{version}"'
+
+    # HANDLERS
+    def get_games(self, params: Dict[str, str]) -> None:
+        """Список / поиск игр, страница по курсору"""
+        search = parse_search(params)
+        try:
+            limit = max(1, min(MAX_LIMIT, int(params.get('limit') or DEFAULT_LIMIT)))
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid limit")
+        kind, value = decode_cursor(params['cursor']) if params.get('cursor') else (None, 0)
+
+        # версия и страница из одного снимка базы - ETag соответствует данным ответа;
+        # страница читается целиком (не больше MAX_LIMIT + 1 записей) и отправляется после транзакции,
+        # чтобы медленный клиент не держал транзакцию чтения (без WAL она блокирует запись)
+        with Game._meta.database.atomic():
+            version = catalog_version()
+            etag = self.etag(version)
+            rows = None if self.fresh(etag) else self.page_rows(search, kind, value, limit, version)
+
+        if self.not_modified(etag):
+            return
+        self.stream_json(self.list_parts(rows, limit, search.plan == GameSearch.FUZZY, value), etag)
+
+    def page_rows(self, search: GameSearch, kind: Optional[str], value: int, limit: int, version: int) -> List[GameRow]:
+        """Записи страницы и одна лишняя - признак следующей страницы"""
+        if search.plan == GameSearch.FUZZY:
+            # ранжированный список id, страница - смещение в нём;
+            # версия в ключе - после любой записи (и из других процессов) список считается заново
+            ids = self.results.get((search.key, 'ranked', version), search.ranked)
+            return self.ranked_page(ids, value if kind == 'offset' else 0, limit)
+
+        query = search.query().select(*GAME_ROW).order_by(Game.id).limit(limit + 1)
+        if kind == 'after':
+            query = query.where(Game.id > value)
+        return [GameRow._make(row) for row in query.tuples()]
+
+    def ranked_page(self, ids, offset: int, limit: int) -> List[GameRow]:
+        page = ids[offset:offset + limit + 1]
+        games = {game.id: game for game in game_rows(Game.select().where(Game.id.in_(page)))}
+        return [games[game_id] for game_id in page if game_id in games]
+
+    def list_parts(self, rows: Iterable[GameRow], limit: int, ranked: bool, offset: int) -> Iterable[str]:
+        """Части JSON ответа списка: игры по одной, в конце курсор следующей страницы"""
+        yield '{"games": ['
+        count = 0
+        last = None
+        for row in rows:
+            if count == limit:
+                # лишняя запись - признак следующей страницы
+                break
+            yield (',' if count else '') + json.dumps(game_json(row), ensure_ascii = False)
+            count += 1
+            last = row
+        else:
+            last = None
+
+        cursor = None
+        if last is not None:
+            cursor = encode_cursor('offset', offset + limit) if ranked else encode_cursor('after', last.id)
+        yield '], "next": ' + json.dumps(cursor) + '}'
+
+    def get_game(self, game_id: int, params: Dict[str, str]) -> None:
+        with Game._meta.database.atomic():
+            etag = self.etag(catalog_version())
+            game = None if self.fresh(etag) else self.find(game_id)
+        if self.not_modified(etag):
+            return
+        self.send_json(HTTPStatus.OK, game_json(game), {'ETag': etag})
+
+    def post_games(self, params: Dict[str, str]) -> None:
+        fields = validate_row(self.read_json())
+        game = Game.create(**fields)
+        self.send_json(HTTPStatus.CREATED, game_json(GameRow(game.id, **fields)), {'Location': f'/games/{game.id}'})
+
+    def put_game(self, game_id: int, params: Dict[str, str], partial: bool = False) -> None:
+        data = self.read_json()
+        with Game._meta.database.atomic():
+            if partial:
+                # не переданные поля - текущие значения игры
+                data = {**game_json(self.find(game_id)), **data}
+            fields = validate_row(data)
+            if not Game.update(**Game.folded(fields)).where(Game.id == game_id).execute():
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Game {game_id} not found")
+        self.send_json(HTTPStatus.OK, game_json(GameRow(game_id, **fields)))
+
+    def patch_game(self, game_id: int, params: Dict[str, str]) -> None:
+        self.put_game(game_id, params, partial = True)
+
+    def delete_game(self, game_id: int, params: Dict[str, str]) -> None:
+        if not Game.delete_by_id(game_id):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Game {game_id} not found")
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def find(self, game_id: int) -> GameRow:
+        rows = game_rows(Game.select().where(Game.id == game_id))
+        if not rows:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Game {game_id} not found")
+        return rows[0]
+
+    def log_message(self, format: str, *args) -> None:
+        # журнал запросов в stderr не нужен на каждый запрос
+        pass
+
+def make_server(host: str, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), CatalogHandler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,64 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class QueryCache:
+    """
+    LRU cache of query results (COUNT and pages of PageCursor)
+    Local writes call invalidate(), changes from other processes are found
+    by PRAGMA data_version, checked not more often than check_interval seconds
+    before_read runs before every read (write-behind queue: pending writes are saved first)
+    """
+    def __init__(self, size: int = 128, check_interval: float = 1.0) -> None:
+        self.size = size
+        self.check_interval = check_interval
+        self.entries: OrderedDict = OrderedDict()
+        # версия данных, увеличивается при каждой записи
+        self.version = 0
+
+        # обработчики и отрисовка работают в разных потоках
+        self.lock = threading.Lock()
+        # data_version своя у каждого соединения, а соединение - у каждого потока
+        self.seen = threading.local()
+        self.before_read: Optional[Callable[[], None]] = None
+
+    def invalidate(self) -> None:
+        """Данные изменились - сбросить все результаты"""
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+
+    def check(self) -> None:
+        """Сбросить кэш, если базу изменило другое соединение"""
+        now = time.monotonic()
+        if now - getattr(self.seen, 'checked', float('-inf')) < self.check_interval:
+            return
+        self.seen.checked = now
+
+        from src.models import Game
+        data_version = Game._meta.database.execute_sql('PRAGMA data_version').fetchone()[0]
+        last = getattr(self.seen, 'data_version', None)
+        if last is not None and last != data_version:
+            self.invalidate()
+        self.seen.data_version = data_version
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Результат из кэша или load(), если его нет"""
+        if self.before_read is not None:
+            self.before_read()
+        self.check()
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            version = self.version
+
+        value = load()
+        with self.lock:
+            # пока выполнялся запрос, данные могли измениться - такой результат не сохраняется
+            if version == self.version:
+                self.entries[key] = value
+                if len(self.entries) > self.size:
+                    self.entries.popitem(last = False)
+        return value
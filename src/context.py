@@ -1,95 +1,302 @@
 import os
-from typing import Union
+import json
+import hashlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from src.utils import Struct, LocalMemory, load_yaml
+from src.utils import Struct, LocalMemory, Frozen, load_yaml, unquote
+from src.template import Template
 
-class Localization(Struct):
-    """Class for control text language"""
+class Question(Frozen):
+    """Question of input page"""
+    __slots__ = ('text', 'error', 'name', 'nullable', 'type')
+
+class Page(Frozen):
+    """Config of one page from locale"""
+    __slots__ = (
+        'name', 'selectable', 'horizontal', 'input', 'actions',
+        'text', 'template', 'questions', 'headers', 'rows', 'row_indent', 'single_row', 'lang_row',
+        'success', 'error', 'delete', 'no_games', 'extra'
+    )
+
+    def __init__(self, **kwargs) -> None:
+        # тексты страниц хранятся в кавычках - убрать их один раз при загрузке
+        if kwargs.get('text'):
+            kwargs['text'] = unquote(kwargs['text'])
+            kwargs['template'] = Template(kwargs['text'])
+        # шаблоны строк таблиц
+        for key in ('single_row', 'lang_row'):
+            if kwargs.get(key):
+                kwargs[key] = Template(kwargs[key])
+        if kwargs.get('questions'):
+            kwargs['questions'] = tuple(Question(**question) for question in kwargs['questions'])
+        if kwargs.get('headers'):
+            kwargs['headers'] = tuple(kwargs['headers'])
+
+        # ключи, которых нет в __slots__, доступны через extra
+        kwargs['extra'] = {key: value for key, value in kwargs.items() if key not in self.__slots__}
+        super().__init__(**kwargs)
+
+    def __getattr__(self, key: str) -> Any:
+        # вызывается только для ключей вне __slots__
+        if key.startswith('__') or key == 'extra':
+            raise AttributeError(key)
+        return self.extra.get(key)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Все ключи конфига страницы как у dict"""
+        for slot in self.__slots__:
+            if slot != 'extra':
+                yield slot, object.__getattribute__(self, slot)
+        yield from self.extra.items()
+
+# объекты скомпилированного пакета, которые можно восстановить из кэша
+CACHED_TYPES = {cls.__name__: cls for cls in (Page, Question, Template)}
+
+@lru_cache(maxsize = None)
+def compiler_version() -> str:
+    """Хэш кода, от которого зависит скомпилированный пакет: изменение разбора страниц сбрасывает кэш"""
+    import src.template
+    digest = hashlib.sha1()
+    for module in (__file__, src.template.__file__):
+        with open(module, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def encode(value: Any) -> Any:
+    """
+    Скомпилированный пакет -> JSON: только примитивы и явные метки типов,
+    при чтении ничего, кроме Page / Question / Template, не создаётся
+    """
+    if isinstance(value, tuple(CACHED_TYPES.values())):
+        return {'$': type(value).__name__, 'v': [encode(object.__getattribute__(value, slot)) for slot in value.__slots__]}
+    if isinstance(value, dict):
+        return {'$': 'dict', 'v': [[encode(key), encode(item)] for key, item in value.items()]}
+    if isinstance(value, frozenset):
+        # порядок множества не постоянен между запусками - кэш одного пакета всегда одинаковый
+        return {'$': 'frozenset', 'v': sorted((encode(item) for item in value), key = repr)}
+    if isinstance(value, tuple):
+        return {'$': 'tuple', 'v': [encode(item) for item in value]}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"{type(value).__name__} can't be cached")
+
+def decode(value: Any) -> Any:
+    """JSON кэша -> скомпилированный пакет, неизвестная метка - ValueError"""
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    kind, items = value.get('$'), value.get('v')
+    if not isinstance(items, list):
+        raise ValueError(f"Invalid cache value {value!r}")
+    if kind == 'dict':
+        return {decode(key): decode(item) for key, item in items}
+    if kind == 'tuple':
+        return tuple(decode(item) for item in items)
+    if kind == 'frozenset':
+        return frozenset(decode(item) for item in items)
+    if kind in CACHED_TYPES:
+        cls = CACHED_TYPES[kind]
+        if len(items) != len(cls.__slots__):
+            raise ValueError(f"Invalid cache value {value!r}")
+        return cls.restore(tuple(decode(item) for item in items))
+    raise ValueError(f"Unknown cache type {kind!r}")
+
+class LocaleCache:
+    """
+    Persistent cache of compiled locales (JSON with type tags, no code is run on read)
+    Entry is used while the source file has the same mtime and size,
+    or the same sha1 if only mtime was changed, and the compiler code is the same
+    """
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+
+    def cache_path(self, source: str) -> str:
+        return os.path.join(self.folder, os.path.basename(source) + '.json')
+
+    def read(self, source: str) -> Optional[Dict]:
+        """Прочитать запись кэша, None если её нет, она повреждена или от другой версии кода"""
+        try:
+            with open(self.cache_path(source), encoding = 'utf-8') as f:
+                entry = json.load(f)
+            if entry.get('version') != compiler_version():
+                return None
+            return dict(key = tuple(entry['key']), hash = entry['hash'], data = decode(entry['data']))
+        except Exception:
+            # при любом сомнении пакет компилируется заново
+            return None
+
+    def write(self, source: str, entry: Dict) -> None:
+        """Сохранить запись кэша, ошибки записи (например read-only) пропускаются"""
+        path = self.cache_path(source)
+        try:
+            os.makedirs(self.folder, exist_ok = True)
+            with open(path + '.tmp', 'w', encoding = 'utf-8') as f:
+                json.dump({**entry, 'data': encode(entry['data'])}, f, ensure_ascii = False)
+            os.replace(path + '.tmp', path)
+        except (OSError, TypeError):
+            pass
+
+    def load(self, source: str, compile: Callable[[Dict], Dict]) -> Dict:
+        """Получить скомпилированный пакет из кэша или скомпилировать YAML файл"""
+        stat = os.stat(source)
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self.read(source)
+        if entry and entry['key'] == key:
+            return entry['data']
+
+        with open(source, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+
+        if entry and entry['hash'] == digest:
+            # файл не менялся, только mtime
+            data = entry['data']
+        else:
+            data = compile(load_yaml(source))
+
+        self.write(source, dict(version = compiler_version(), key = key, hash = digest, data = data))
+        return data
+
+class Localization:
+    """Class for control text language, pages are compiled once at load"""
     path = './locale'
+    cache = LocaleCache(f'{path}/.cache')
 
     def __init__(self, language: str) -> None:
         self.language = language.upper()
 
-        # загрузка нужного языкового пакета 
-        data = load_yaml(f'{self.path}/{self.language.lower()}-{self.language.upper()}.yml')
-        
-        # подгрузка всего пакета в self.__dict__
-        super().__init__(**data)
+        # загрузка нужного языкового пакета (из кэша, если файл не менялся)
+        data = self.cache.load(f'{self.path}/{self.language.lower()}-{self.language.upper()}.yml', Localization.compile)
+        self.__dict__.update(data)
 
-    def __getattr__(cls, key: str) -> Union[str, Struct]:
-        # получение переменной из self.__dict__
-        res = super().__getattr__(key)
+    @staticmethod
+    def compile(data: Dict) -> Dict:
+        """Страницы -> Page, тексты без кавычек"""
+        compiled = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                value = Page(**value)
+            elif isinstance(value, str):
+                value = unquote(value)
+            compiled[key] = value
+        return compiled
 
-        # если это текст, он начинается и заканчивается с " то убрать это. 
-        if isinstance(res, str) and\
-           res.strip().startswith('"') and\
-           res.strip().endswith('"'):
-            res = res.strip()[1:-1]
+    def __getattr__(self, key: str) -> Any:
+        # вызывается только если ключа нет в пакете
+        if key.startswith('__'):
+            raise AttributeError(key)
+        return None
 
-        # вернуть полученное значение
-        return res
+class LanguageInfo(Frozen):
+    """Metadata of installed language pack"""
+    __slots__ = ('language', 'lang_name', 'path')
 
+class LanguageRegistry:
+    """
+    Installed languages from ./locale
+    Only metadata (lang_name) is read on scan, full pack is loaded on select
+    Directory is rescanned when a locale file is added, removed or changed (mtime / size of each file)
+    """
+    # ключи метаданных в начале файла локализации
+    metadata = ('lang_name',)
 
-    @staticmethod
-    def get_languages() -> list:
-        """Получить список всех локализаций из ./locale"""
-        files = os.listdir(Localization.path)
+    def __init__(self, path: str = Localization.path) -> None:
+        self.path = path
+        self.version: Optional[Tuple] = None
+        self._languages: Tuple[LanguageInfo, ...] = ()
+        self._packs: Dict[str, Localization] = {}
 
+    @property
+    def languages(self) -> Tuple[LanguageInfo, ...]:
+        """Список языков, пересканировать если изменилась папка или любой файл локализации"""
+        version = self.stamp()
+        if version != self.version:
+            self._languages = self.scan()
+            self._packs.clear()
+            self.version = version
+        return self._languages
+
+    def files(self) -> List[str]:
+        """Файлы локализаций языков в папке"""
+        # пропустить all-ALL.yml (там только страница выбора языка)
+        return sorted(
+            file for file in os.listdir(self.path)
+            if file.endswith(('.yml', '.yaml')) and 'all-ALL' not in file
+        )
+
+    def stamp(self) -> Tuple:
+        """Версия папки: mtime / размер каждого файла (изменение lang_name не меняет mtime папки)"""
+        stamp = []
+        for file in self.files():
+            stat = os.stat(os.path.join(self.path, file))
+            stamp.append((file, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def scan(self) -> Tuple[LanguageInfo, ...]:
+        """Прочитать метаданные всех локализаций из папки"""
         langs = []
+        for file in self.files():
+            path = os.path.join(self.path, file)
+            langs.append(LanguageInfo(
+                language = file.split('.')[0].split('-')[0].upper(),
+                path = path,
+                **self.read_metadata(path)
+            ))
+        return tuple(langs)
 
-        for file in files:
-            # пропустить all-ALL.yml (там только страница выбора языка)
-            if 'all-ALL' in file: continue
+    def read_metadata(self, path: str) -> Dict[str, Any]:
+        """Прочитать только ключи метаданных, не разбирая весь YAML"""
+        import yaml
+        data = {}
+        with open(path, 'r', encoding = 'utf-8') as f:
+            for line in f:
+                if line[:1].isspace() or line.startswith('#') or ':' not in line:
+                    continue
+                key, value = line.split(':', 1)
+                if key not in self.metadata:
+                    # метаданные закончились на первой странице / баннере
+                    if not value.strip() or value.strip() in ('|', '>'):
+                        break
+                    continue
+                data[key] = yaml.safe_load(value)
+        return data
 
-            if (file.endswith('.yml') or file.endswith('.yaml')):
-                lang = file.split('.')[0].split('-')[0]
-                # подгрузить объект локализации
-                langs.append(Localization(lang))
+    def load(self, language: str) -> Localization:
+        """Загрузить языковой пакет при выборе языка"""
+        language = language.upper()
+        if language not in self._packs:
+            self._packs[language] = Localization(language)
+        return self._packs[language]
 
-        return langs
-    
 class Context:
     """
     Main Context class, store all info about current program state
     Like Model
     """
 
-    @staticmethod
-    def format_string(text: str, **kwargs) -> str:
-        """Format string with kwargs"""
-        return text.format(**kwargs)
-
     def __init__(self):
         self.storage = Struct()
         self.memory = LocalMemory()
-        self.text = ''
+        self.template: Template = None
     
-    def clear_console(self) -> None:
-        """Clear console"""
-        os.system('cls')
-
     def clear(self) -> None:
-        """Clear current text and storage"""
+        """Clear current template and storage"""
         self.storage.clear()
-        self.text = ''
+        self.template = None
 
     def set_storage(self, **kwargs) -> None:
         """Add new values to storage"""
         self.storage.update(**kwargs)
 
-    def set(self, text: str, **kwargs) -> None:
-        """Set text and storage"""
-        self.text = text
+    def set(self, template: Template, **kwargs) -> None:
+        """Set page template and storage"""
+        self.template = template
         self.set_storage(**kwargs)
 
-    def show(self, endless = False) -> str:
-        """Show page"""
-        text = Context.format_string(self.text, **self.storage)
-        if text.strip().startswith('"') and\
-           text.strip().endswith('"'):
-            text = text.strip()[1:-1]
-
-        print(text, end = '' if endless else '\n')
-        
-
-        return text
+    def render(self, select: int = 0) -> str:
+        """Render page with values from storage"""
+        return self.template.render(self.storage, select = select)
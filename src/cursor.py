@@ -0,0 +1,219 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Type
+
+from peewee import Field, Model, ModelSelect, fn
+
+from src.models import Game, GameRow, AuthorFacet, game_rows, fold
+from src.search import GameSearch, TextFilter, LIVE_CANDIDATES
+from src.cache import QueryCache
+
+class PageCursor:
+    """
+    Постраничный курсор по запросу к Game (keyset pagination по Game.id)
+    В памяти хранится только текущая страница (GameRow) и закэшированный COUNT
+    С cache и key результаты общие для всех курсоров с тем же key
+    """
+    def __init__(self,
+                 query: ModelSelect,
+                 rows: int,
+                 cache: Optional[QueryCache] = None,
+                 key: Hashable = None,
+                 order: Field = Game.id) -> None:
+        self.query = query
+        self.rows = rows
+        self.cache = cache
+        self.key = key
+        # уникальная колонка с индексом, по которой идут страницы
+        self.order = order
+
+        # последнее значение order на каждой из просмотренных страниц, None - "страница" до первой
+        self.bounds: Dict[int, Any] = {0: None}
+
+        self.current_page: Optional[int] = None
+        self.items: List[Any] = []
+        self._count: Optional[int] = None
+        self._widths: Optional[Tuple[int, ...]] = None
+
+    @property
+    def count(self) -> int:
+        """Количество записей в запросе, считается один раз"""
+        if self._count is None:
+            if self.cache is None:
+                self._count = self.query.count()
+            else:
+                self._count = self.cache.get((self.key, 'count'), self.query.count)
+        return self._count
+
+    @property
+    def widths(self) -> Tuple[int, ...]:
+        """
+        Максимальная длина name / author / year во всём запросе, считается один раз
+        """
+        if self._widths is None:
+            if self.cache is None:
+                self._widths = self.load_widths()
+            else:
+                self._widths = self.cache.get((self.key, 'widths'), self.load_widths)
+        return self._widths
+
+    def load_widths(self) -> Tuple[int, ...]:
+        columns = (fn.MAX(fn.LENGTH(Game.name)), fn.MAX(fn.LENGTH(Game.author)), fn.MIN(Game.year), fn.MAX(Game.year))
+        if self.query._where is None:
+            # каждый агрегат отдельным запросом - sqlite берёт его из индекса за O(log n)
+            values = [self.query.select(column).scalar() for column in columns]
+        else:
+            # с фильтрами - один проход по результату
+            values = self.query.select(*columns).tuples().get()
+
+        name, author, *years = [value or 0 for value in values]
+        return name, author, max(len(str(year)) for year in years)
+
+    def values(self, game: GameRow) -> Tuple[Any, ...]:
+        """Значения колонок таблицы для записи"""
+        return game.name, game.author, game.year
+
+    @property
+    def max_page(self) -> int:
+        """Количество страниц"""
+        return max(1, -(-self.count // self.rows))
+
+    def page(self, number: int) -> List[Any]:
+        """Получить записи страницы number (начиная с 1)"""
+        if number == self.current_page:
+            return self.items
+
+        if self.cache is None:
+            self.items = self.load(number)
+        else:
+            self.items = self.cache.get((self.key, self.rows, number), lambda: self.load(number))
+
+        self.current_page = number
+        if self.items:
+            self.bounds[number] = getattr(self.items[-1], self.order.name)
+
+        return self.items
+
+    def load(self, number: int) -> List[Any]:
+        """Запрос страницы к базе"""
+        # ближайшая известная граница перед нужной страницей
+        known = max(page for page in self.bounds if page < number)
+        query = self.query.order_by(self.order).limit(self.rows)
+        if self.bounds[known] is not None:
+            query = query.where(self.order > self.bounds[known])
+
+        if known != number - 1:
+            # граница неизвестна (прыжок через страницы) - пропустить записи по индексу id
+            query = query.offset((number - 1 - known) * self.rows)
+
+        return self.fetch(query)
+
+    def fetch(self, query: ModelSelect) -> List[Any]:
+        """Записи страницы: компактные GameRow вместо моделей"""
+        return game_rows(query)
+
+class FacetCursor(PageCursor):
+    """Постраничный курсор по счётчикам игр издателей (AuthorFacet) или годов (YearFacet)"""
+    def __init__(self, model: Type[Model], rows: int, cache: Optional[QueryCache] = None) -> None:
+        self.model = model
+        super().__init__(
+            model.select(), rows,
+            cache = cache,
+            key = ('facets', model._meta.table_name),
+            order = model._meta.primary_key
+        )
+
+    def load_widths(self) -> Tuple[int, ...]:
+        value, games = self.query.select(fn.MAX(fn.LENGTH(self.order)), fn.MAX(self.model.games)).tuples().get()
+        return value or 0, len(str(games or 0))
+
+    def fetch(self, query: ModelSelect) -> List[Model]:
+        # счётчиков мало, и страница из двух колонок
+        return list(query)
+
+    def values(self, facet: Model) -> Tuple[Any, ...]:
+        return getattr(facet, self.order.name), facet.games
+
+    def search(self, facet: Model) -> GameSearch:
+        """Поиск игр выбранного издателя / года"""
+        if self.model is AuthorFacet:
+            # значение издателя как есть, без разбора * в фильтре и без fold(): счётчики - по author как в базе
+            return GameSearch(author = TextFilter(facet.author, TextFilter.VERBATIM))
+        return GameSearch(year = facet.year)
+
+class RankedCursor(PageCursor):
+    """Постраничный курсор по списку id, отсортированному по релевантности (нечёткий поиск)"""
+    def __init__(self, ids: List[int], rows: int, cache: Optional[QueryCache] = None, key: Hashable = None) -> None:
+        super().__init__(Game.select().where(Game.id.in_(ids)), rows, cache = cache, key = key)
+        self.ids = ids
+        self._count = len(ids)
+
+    def load(self, number: int) -> List[GameRow]:
+        ids = self.ids[(number - 1) * self.rows:number * self.rows]
+        games = {game.id: game for game in game_rows(Game.select().where(Game.id.in_(ids)))}
+        # игра могла быть удалена после поиска
+        return [games[game_id] for game_id in ids if game_id in games]
+
+class CandidateCursor(PageCursor):
+    """
+    Постраничный курсор по кандидатам поиска по мере ввода (name начинается с text)
+    Кандидаты хранятся в памяти: если набор полный (не обрезан limit), следующий символ
+    запроса фильтрует его без обращения к базе, parent - набор более короткого запроса
+    """
+    def __init__(self,
+                 text: str,
+                 games: List[GameRow],
+                 complete: bool,
+                 rows: int,
+                 parent: Optional['CandidateCursor'] = None) -> None:
+        super().__init__(Game.select(), rows)
+        self.text = text
+        self.games = games
+        self.complete = complete
+        self.parent = parent
+        self._count = len(games)
+
+    @classmethod
+    def search(cls,
+               text: str,
+               rows: int,
+               previous: Optional['CandidateCursor'] = None,
+               limit: int = LIVE_CANDIDATES) -> 'CandidateCursor':
+        """Кандидаты для text: уточнение предыдущего набора или запрос по индексу name_fold"""
+        # кандидаты без учёта регистра и диакритики, как в поиске name*
+        text = fold(text)
+        # ближайший из предыдущих запросов, которым начинается text
+        base = previous
+        while base is not None and not text.startswith(base.text):
+            base = base.parent
+
+        if base is not None and base.text == text:
+            # символ стёрт - набор этого запроса уже есть
+            return base
+        if not text:
+            # пустой запрос - ничего не найдено, и набор полный: страница без "+"
+            return cls(text, [], True, rows)
+        if base is not None and base.complete and base.text:
+            # пустой набор пустого запроса не сужается - кандидаты из индекса
+            games = [game for game in base.games if fold(game.name).startswith(text)]
+            return cls(text, games, True, rows, parent = base)
+
+        # диапазон по индексу name_fold уже отсортирован по name_fold, limit + 1 - узнать, что набор обрезан
+        query = GameSearch(name = TextFilter(text, TextFilter.PREFIX)).query()
+        games = game_rows(query.order_by(Game.name_fold, Game.id).limit(limit + 1))
+        return cls(text, games[:limit], len(games) <= limit, rows, parent = base)
+
+    def load_widths(self) -> Tuple[int, ...]:
+        return (
+            max((len(game.name) for game in self.games), default = 0),
+            max((len(game.author) for game in self.games), default = 0),
+            max((len(str(game.year)) for game in self.games), default = 0),
+        )
+
+    def load(self, number: int) -> List[GameRow]:
+        return self.games[(number - 1) * self.rows:number * self.rows]
+
+def search_cursor(search: GameSearch, rows: int, cache: Optional[QueryCache] = None) -> PageCursor:
+    """Курсор по результатам поиска: по id или по схожести для нечёткого поиска"""
+    if search.plan == GameSearch.FUZZY:
+        ids = cache.get((search.key, 'ranked'), search.ranked) if cache is not None else search.ranked()
+        return RankedCursor(ids, rows, cache = cache, key = search.key)
+    return PageCursor(search.query(), rows, cache = cache, key = search.key)
@@ -0,0 +1,92 @@
+import os
+from typing import Any, Dict, Optional
+
+from peewee import Database, DatabaseProxy, SqliteDatabase
+from playhouse.pool import PooledSqliteDatabase
+
+# настройки из окружения
+PATH_ENV = 'GAMES_DB'
+MODE_ENV = 'GAMES_DB_MODE'
+POOL_ENV = 'GAMES_DB_POOL'
+
+DEFAULT_PATH = 'games.db'
+MEMORY = ':memory:'
+
+# режимы журнала
+WAL = 'wal'             # WAL + synchronous=NORMAL: fsync только при checkpoint
+WAL_FULL = 'wal-full'   # WAL + fsync на каждый commit
+ROLLBACK = 'rollback'   # rollback journal, настройки sqlite по умолчанию
+
+MODES: Dict[str, Dict[str, Any]] = {
+    WAL: {'journal_mode': 'wal', 'synchronous': 'normal'},
+    WAL_FULL: {'journal_mode': 'wal', 'synchronous': 'full'},
+    ROLLBACK: {'journal_mode': 'delete', 'synchronous': 'full'},
+}
+
+# общие для всех режимов
+PRAGMAS: Dict[str, Any] = {
+    'cache_size': -64 * 1024,           # 64 MB кэша страниц на соединение
+    'mmap_size': 256 * 1024 * 1024,     # чтение через mmap без копирования в кэш
+    'temp_store': 'memory',
+}
+
+MAX_CONNECTIONS = 16
+STALE_TIMEOUT = 300
+# сколько секунд ждать свободного соединения, когда заняты все
+POOL_TIMEOUT = 10
+
+def open_database(path: Optional[str] = None,
+                  mode: Optional[str] = None,
+                  pool: Optional[int] = None,
+                  **pragmas) -> Database:
+    """
+    Создать базу (соединение откроется при первом запросе)
+    path, mode, pool - по умолчанию из GAMES_DB, GAMES_DB_MODE, GAMES_DB_POOL
+    pool - максимум соединений, 0 - без пула
+    У каждого потока своё соединение, закрытое соединение возвращается в пул
+    """
+    path = path or os.environ.get(PATH_ENV, DEFAULT_PATH)
+    mode = mode or os.environ.get(MODE_ENV, WAL)
+    if mode not in MODES:
+        raise ValueError(f"Unknown database mode {mode}, expected one of: {', '.join(MODES)}")
+    if pool is None:
+        pool = int(os.environ.get(POOL_ENV, MAX_CONNECTIONS))
+
+    pragmas = {**PRAGMAS, **MODES[mode], **pragmas}
+    if not pool or path == MEMORY:
+        # у каждого соединения к :memory: своя база - пул не имеет смысла
+        return SqliteDatabase(path, pragmas = pragmas)
+
+    return PooledSqliteDatabase(
+        path,
+        pragmas = pragmas,
+        # соединение, возвращённое в пул одним потоком, берёт другой;
+        # одновременно соединением пользуется только один поток - peewee выдаёт их по потокам
+        check_same_thread = False,
+        max_connections = pool,
+        stale_timeout = STALE_TIMEOUT,
+        timeout = POOL_TIMEOUT,
+    )
+
+class LazyDatabase(DatabaseProxy):
+    """
+    Proxy to the database that is opened from the environment on first use
+    initialize() sets another database before that (tests, benchmarks, other path),
+    attach_callback() callbacks run on every new database (schema creation)
+    """
+    def get(self) -> Database:
+        if self.obj is None:
+            self.initialize(open_database())
+        return self.obj
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith('_'):
+            # служебные атрибуты proxy / python не должны открывать базу
+            return super().__getattr__(attr)
+        return getattr(self.get(), attr)
+
+    def __enter__(self) -> Database:
+        return self.get().__enter__()
+
+    def __exit__(self, *exc) -> None:
+        return self.get().__exit__(*exc)
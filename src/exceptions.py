@@ -12,4 +12,9 @@ class PageNotExist(GameException):
     pass
 
 class InputValidatorNotExist(GameException): 
-    pass
\ No newline at end of file
+    pass
+class ApiError(GameException):
+    """Error of the HTTP API with response status"""
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
@@ -1,20 +1,47 @@
 from abc import ABC
 import re
-from typing import Any, Callable
+from typing import Any, Callable, Iterable, List, Tuple
+from dataclasses import dataclass, field
 
 
 from src.exceptions import InputValidationError
 
+@dataclass(frozen = True)
+class IntRange:
+    """Inclusive range of integers, like 1990-2000"""
+    start: int
+    end: int
+
+    def __str__(self) -> str:
+        if self.start == self.end:
+            return str(self.start)
+        return f"{self.start}-{self.end}"
+
+@dataclass
+class BatchResult:
+    """
+    Validated column: values[i] - converted value of row i (None if invalid),
+    errors - (row index, error) only for invalid rows
+    """
+    values: List[Any] = field(default_factory = list)
+    errors: List[Tuple[int, str]] = field(default_factory = list)
+
+TRUE_VALUES = frozenset(('true', 'tru', 'yes', 'da', '1', '+', 'y'))
+FALSE_VALUES = frozenset(('false', 'fals', 'no', 'net', '0', '-', 'n'))
+INT_RANGE = re.compile(r'(\d+)(?:(?:-|\.\.)(\d+))?')
+
 class AbstractInputManager(ABC):
     def get_input(cls, _type: str, on_error: Callable, 
                   on_success: Callable = None, custom_validation: Callable = None, 
                   regex_pattern: str = None, debug_value: str = None) -> Any: ...
     def validate(cls, text: str, _type: str, *args, **kwargs) -> Any: ...
+    def validate_many(cls, values: Iterable[str], _type: str, regex_pattern: str = None) -> BatchResult: ...
     def bool_validation(value: str) -> bool: ...
     def str_validation(value: str, regex_pattern: str  = None) -> str: ...
     def int_validation(value: str) -> int: ...
     def float_validation(value: str) -> float: ...
     def list_validation(value: str) -> list: ...
+    def intrange_validation(value: str) -> IntRange: ...
 
 class InputManager(AbstractInputManager):
     """Input manager with basic validation"""
@@ -34,14 +61,14 @@ class InputManager(AbstractInputManager):
         """
         try:
             # if debug -> skip input
-            value = input() if not debug_value else debug_value
+            value = input() if debug_value is None else debug_value
             # if not custom_validation -> run default
             if not custom_validation:
                 # strings validation may consist regex pattern
                 if _type == str and regex_pattern:
-                    result = cls.validate(value, _type.__name__, regex_pattern = regex_pattern)
+                    result = cls.validate(value, _type.__name__.lower(), regex_pattern = regex_pattern)
                 else:
-                    result = cls.validate(value, _type.__name__)
+                    result = cls.validate(value, _type.__name__.lower())
 
             else:
                 # run custom validation
@@ -66,19 +93,87 @@ class InputManager(AbstractInputManager):
         validator = object.__getattribute__(cls, f"{_type}_validation")
         return validator(value = text, *args, **kwargs)
 
+    @classmethod
+    def validate_many(cls, values: Iterable[str], _type: str, regex_pattern: str = None) -> BatchResult:
+        """
+        Validate a column of values of one type (bulk import)
+        Converter and regex are prepared once for the whole column,
+        the error text is built only for invalid values - the same as validate() gives
+        """
+        convert = cls.batch_converter(_type, regex_pattern)
+        result = BatchResult()
+        append = result.values.append
+        for index, value in enumerate(values):
+            try:
+                append(convert(value))
+            except (ValueError, InputValidationError):
+                append(None)
+                try:
+                    # медленный путь только для ошибок: текст ошибки как у validate()
+                    cls.validate(value, _type, **({'regex_pattern': regex_pattern} if regex_pattern else {}))
+                    message = f"Error while validating input \"{value}\" as {_type}"
+                except InputValidationError as e:
+                    message = str(e)
+                result.errors.append((index, message))
+        return result
+
+    @staticmethod
+    def batch_converter(_type: str, regex_pattern: str = None) -> Callable[[str], Any]:
+        """
+        Converter of one value for validate_many: same rules as {_type}_validation,
+        without per-value lookup and error formatting, raises ValueError
+        """
+        if _type == 'str':
+            if not regex_pattern:
+                return str
+            match = re.compile(regex_pattern).match
+            def convert(value: str) -> str:
+                if match(value) is None:
+                    raise ValueError(value)
+                return value
+            return convert
+
+        if _type == 'int':
+            return lambda value: int(value.replace('_', '').replace(' ', ''))
+
+        if _type == 'float':
+            return lambda value: float(value.replace(',', '.').replace('_', '').replace(' ', ''))
+
+        if _type == 'bool':
+            def convert(value: str) -> bool:
+                lower = value.lower()
+                if lower in TRUE_VALUES:
+                    return True
+                if lower in FALSE_VALUES:
+                    return False
+                raise ValueError(value)
+            return convert
+
+        if _type == 'list':
+            return lambda value: value.split(',')
+
+        if _type == 'intrange':
+            fullmatch = INT_RANGE.fullmatch
+            def convert(value: str) -> IntRange:
+                match = fullmatch(value.replace('_', '').replace(' ', ''))
+                if not match:
+                    raise ValueError(value)
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else start
+                return IntRange(min(start, end), max(start, end))
+            return convert
+
+        raise InputValidationError(f"Unknown type \"{_type}\"")
+
     @staticmethod
     def bool_validation(value: str) -> bool: 
         """
         Validate value as bool
         """
-        if value.lower() in (
-                    'true', 'tru', 'yes', 
-                    'da', '1', '+', 'y'):
+        if value.lower() in TRUE_VALUES:
             return True
         
-        elif value.lower() in (
-                    'false', 'fals', 'no', 
-                    'net', '0', '-', 'n'):
+        elif value.lower() in FALSE_VALUES:
             return False
         
         else:
@@ -113,3 +208,15 @@ class InputManager(AbstractInputManager):
     def list_validation(value: str) -> list:
         """validate list as one,two,three"""
         return value.split(',')
+
+    @staticmethod
+    def intrange_validation(value: str) -> IntRange:
+        """validate range as 1990-2000, 1990..2000 or single 1990"""
+        svalue = value.replace('_', '').replace(' ', '')
+        match = INT_RANGE.fullmatch(svalue)
+        if not match:
+            raise InputValidationError(f"Error while validating input \"{value}\" as range")
+
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        return IntRange(min(start, end), max(start, end))
@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import codecs
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+class ControlKey:
+    UP = 'up'
+    DOWN = 'down'
+    LEFT = 'left'
+    RIGHT = 'right'
+
+    ENTER = 'enter'
+    ESC = 'esc'
+    BACKSPACE = 'backspace'
+    STATS = 'stats'
+    # не клавиша: результат фоновой задачи готов, нужно перерисовать кадр
+    REFRESH = 'refresh'
+    UNKNOW = False
+
+# перемещения: ось (кнопка / страница) и шаг, подряд идущие схлопываются в одно
+MOVES: Dict[str, Tuple[str, int]] = {
+    ControlKey.UP: ('button', -1),
+    ControlKey.DOWN: ('button', 1),
+    ControlKey.LEFT: ('page', -1),
+    ControlKey.RIGHT: ('page', 1),
+}
+
+class KeyEvent(NamedTuple):
+    """Decoded key press: control key and source text of the key"""
+    key: Union[str, bool]
+    char: str
+
+    @property
+    def printable(self) -> bool:
+        """Символ для ввода текста, а не escape последовательность или управляющий символ"""
+        return len(self.char) == 1 and self.char.isprintable()
+
+# все последовательности клавиш: WASD (en / ru раскладка), стрелки ANSI / VT и Windows
+KEY_TABLE: Dict[str, str] = {
+    **dict.fromkeys(('w', 'W', 'ц', 'Ц', '\x1b[A', '\x1bOA', 'àH', '\x00H'), ControlKey.UP),
+    **dict.fromkeys(('s', 'S', 'ы', 'Ы', '\x1b[B', '\x1bOB', 'àP', '\x00P'), ControlKey.DOWN),
+    **dict.fromkeys(('a', 'A', 'ф', 'Ф', '\x1b[D', '\x1bOD', 'àK', '\x00K'), ControlKey.LEFT),
+    **dict.fromkeys(('d', 'D', 'в', 'В', '\x1b[C', '\x1bOC', 'àM', '\x00M'), ControlKey.RIGHT),
+    # msvcrt отдаёт \r, терминал в raw режиме - \n
+    **dict.fromkeys(('\r', '\n'), ControlKey.ENTER),
+    '\x1b': ControlKey.ESC,
+    **dict.fromkeys(('\x7f', '\x08'), ControlKey.BACKSPACE),
+    # строка статистики кадра (клавиша ` / ё)
+    **dict.fromkeys(('`', 'ё', 'Ё'), ControlKey.STATS),
+}
+
+# ключ узла автомата: событие, если последовательность закончилась на этом узле
+END = ''
+
+class KeyDecoder:
+    """
+    Table-driven state machine for key sequences
+    The table is compiled into a trie: a leaf is a ready KeyEvent,
+    so a single key costs one dict lookup
+    """
+    def __init__(self, table: Dict[str, str] = KEY_TABLE) -> None:
+        self.root: Dict = {}
+        for sequence, key in table.items():
+            self.add(sequence, KeyEvent(key, sequence))
+
+        # текущее состояние: узел автомата и прочитанная часть последовательности
+        self.node = self.root
+        self.sequence = ''
+
+    def add(self, sequence: str, event: KeyEvent) -> None:
+        node = self.root
+        for char in sequence[:-1]:
+            child = node.get(char)
+            if child is None:
+                child = node[char] = {}
+            elif isinstance(child, KeyEvent):
+                # последовательность - начало другой (ESC и ESC [ A)
+                child = node[char] = {END: child}
+            node = child
+
+        last = sequence[-1]
+        if isinstance(node.get(last), dict):
+            node[last][END] = event
+        else:
+            node[last] = event
+
+    def feed(self, text: str, final: bool = True) -> List[KeyEvent]:
+        """
+        Декодировать прочитанный текст в события
+        final - больше данных сейчас нет, незаконченная последовательность
+        (например одиночный ESC) отдаётся как есть
+        """
+        events = []
+        for char in text:
+            child = self.node.get(char)
+            if child is None and self.node is not self.root:
+                # последовательность оборвалась - отдать начало и начать заново с этого символа
+                events.append(self.reset())
+                child = self.root.get(char)
+
+            if child is None:
+                events.append(KeyEvent(ControlKey.UNKNOW, char))
+            elif isinstance(child, KeyEvent):
+                events.append(child)
+                self.node, self.sequence = self.root, ''
+            else:
+                self.node = child
+                self.sequence += char
+
+        if final and self.node is not self.root:
+            events.append(self.reset())
+        return events
+
+    def reset(self) -> KeyEvent:
+        """Сбросить автомат, вернуть событие для прочитанной части последовательности"""
+        event = self.node.get(END) or KeyEvent(ControlKey.UNKNOW, self.sequence)
+        self.node, self.sequence = self.root, ''
+        return event
+
+class KeyReader:
+    """
+    Non-blocking keyboard input for the whole session
+    Terminal is switched to raw mode once, stdin is read by the event loop
+    (add_reader, or a thread with msvcrt on Windows) into asyncio.Queue
+    """
+    def __init__(self) -> None:
+        self.decoder = KeyDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')(errors = 'replace')
+        self.fd = None
+        self.saved = None
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.paused = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def raw(self) -> None:
+        """Выключить канонический режим и эхо терминала"""
+        if os.name == 'nt' or not sys.stdin.isatty():
+            return
+        import termios
+        self.fd = sys.stdin.fileno()
+        self.saved = termios.tcgetattr(self.fd)
+        attrs = termios.tcgetattr(self.fd)
+        attrs[3] = attrs[3] & ~termios.ICANON & ~termios.ECHO
+        attrs[6][termios.VMIN] = 1
+        attrs[6][termios.VTIME] = 0
+        termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+
+    def restore(self) -> None:
+        """Вернуть терминал в исходный режим"""
+        if self.saved is None:
+            return
+        import termios
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+        self.saved = None
+
+    @contextmanager
+    def attach(self, loop: asyncio.AbstractEventLoop) -> Iterator['KeyReader']:
+        """Raw режим и чтение stdin в очередь событий на время сессии"""
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.raw()
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+            self.restore()
+
+    def start(self) -> None:
+        """Начать чтение stdin"""
+        if os.name == 'nt':
+            self.paused.clear()
+            if self.thread is None:
+                self.thread = threading.Thread(target = self.read_thread, daemon = True)
+                self.thread.start()
+        else:
+            self.loop.add_reader(sys.stdin.fileno(), self.on_readable)
+
+    def stop(self) -> None:
+        """Остановить чтение stdin (например на время input())"""
+        if os.name == 'nt':
+            self.paused.set()
+        else:
+            self.loop.remove_reader(sys.stdin.fileno())
+
+    @contextmanager
+    def cooked(self) -> Iterator[None]:
+        """Обычный режим терминала и без чтения stdin на время input()"""
+        raw = self.saved is not None
+        self.stop()
+        self.restore()
+        try:
+            yield
+        finally:
+            if raw:
+                self.raw()
+            self.start()
+
+    def read_text(self) -> str:
+        """Прочитать всё, что уже есть во входном буфере"""
+        if os.name == 'nt':
+            import msvcrt
+            text = msvcrt.getwch()
+            while msvcrt.kbhit():
+                text += msvcrt.getwch()
+            return text
+
+        data = os.read(sys.stdin.fileno(), 1024)
+        if not data:
+            raise EOFError("stdin is closed")
+        return self.utf8.decode(data)
+
+    def on_readable(self) -> None:
+        """stdin готов к чтению (вызывается event loop)"""
+        try:
+            self.push(self.read_text())
+        except EOFError:
+            self.loop.remove_reader(sys.stdin.fileno())
+            self.queue.put_nowait(None)
+
+    def read_thread(self) -> None:
+        """Чтение клавиатуры на Windows, где нельзя add_reader для консоли"""
+        import msvcrt
+        while True:
+            if self.paused.is_set() or not msvcrt.kbhit():
+                time.sleep(0.005)
+                continue
+            self.loop.call_soon_threadsafe(self.push, self.read_text())
+
+    async def read_line(self) -> str:
+        """Строка для страницы ввода: на время input() терминал возвращается в обычный режим"""
+        with self.cooked():
+            return await self.loop.run_in_executor(None, input)
+
+    def push(self, text: str) -> None:
+        for event in self.decoder.feed(text):
+            self.queue.put_nowait(event)
+
+    def wake(self) -> None:
+        """Разбудить цикл отрисовки без нажатия клавиши"""
+        if self.queue is not None:
+            self.queue.put_nowait(KeyEvent(ControlKey.REFRESH, ''))
+
+    def drain(self) -> List[KeyEvent]:
+        """Забрать все накопившиеся события без ожидания"""
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        if None in events:
+            raise EOFError("stdin is closed")
+        return events
+
+    async def events(self) -> List[KeyEvent]:
+        """Дождаться хотя бы одного события и забрать все накопившиеся"""
+        event = await self.queue.get()
+        if event is None:
+            raise EOFError("stdin is closed")
+        return [event] + self.drain()
@@ -1,15 +1,244 @@
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+
 from peewee import *
+from peewee import ModelSelect
+from playhouse.sqlite_ext import FTS5Model, SearchField, RowIDField
+
+from src.database import LazyDatabase
+
+# база открывается при первом запросе, путь и режим - из окружения (src/database.py)
+db = LazyDatabase()
 
-db = SqliteDatabase('games.db')
+# версия правил fold(): при изменении формы в существующей базе пересчитываются (PRAGMA user_version)
+FOLD_VERSION = 2
+
+@lru_cache(maxsize = None)
+def fold_char(char: str) -> str:
+    """Символ без диакритики (é -> e), кроме букв кириллицы с ней: й, ё, ї - отдельные буквы"""
+    decomposed = unicodedata.normalize('NFD', char)
+    if len(decomposed) == 1 or unicodedata.name(decomposed[0], '').startswith('CYRILLIC'):
+        return char
+    return ''.join(mark for mark in decomposed if not unicodedata.combining(mark))
+
+def fold(text: str) -> str:
+    """
+    Форма текста для поиска без учёта регистра и диакритики: casefold + NFKC,
+    знаки удаляются у латиницы (é -> e), й / и и ё / е остаются разными буквами.
+    NOCASE и LIKE sqlite понимают только ASCII
+    """
+    if text.isascii():
+        return text.lower()
+    return ''.join(map(fold_char, unicodedata.normalize('NFKC', text.casefold())))
 
 class Game(Model):
     id = AutoField()
-    name = CharField()
-    author = CharField()
-    year = IntegerField()
+    name = CharField(index = True)
+    author = CharField(index = True)
+    year = IntegerField(index = True)
+    # fold(name), fold(author) - заполняются при save() и folded(), для старых записей - в create_schema
+    name_fold = CharField(index = True, null = True)
+    author_fold = CharField(index = True, null = True)
+
+    class Meta:
+        database = db
+        indexes = (
+            # составные индексы под комбинации фильтров find_game
+            (('author_fold', 'year'), False),
+            (('name_fold', 'year'), False),
+        )
+
+    @staticmethod
+    def folded(fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Поля для insert / update с формами name_fold, author_fold"""
+        fields = dict(fields)
+        if 'name' in fields:
+            fields['name_fold'] = fold(fields['name'])
+        if 'author' in fields:
+            fields['author_fold'] = fold(fields['author'])
+        return fields
+
+    def save(self, *args, **kwargs):
+        self.name_fold = fold(self.name) if self.name is not None else None
+        self.author_fold = fold(self.author) if self.author is not None else None
+        return super().save(*args, **kwargs)
+
+# индексы по длине name / author: MAX(LENGTH(...)) для ширины колонок таблицы
+# берётся из индекса, индекс обновляется sqlite при каждой записи
+Game.add_index(Game.index(fn.LENGTH(Game.name), name = 'game_name_length'))
+Game.add_index(Game.index(fn.LENGTH(Game.author), name = 'game_author_length'))
+
+class GameRow(NamedTuple):
+    """
+    Запись игры для списков и поиска: только значения колонок, без состояния модели peewee
+    Полная модель Game загружается через instance(), когда нужна (изменение игры)
+    """
+    id: int
+    name: str
+    author: str
+    year: int
+
+    def instance(self) -> Game:
+        return Game.get_by_id(self.id)
+
+# колонки запроса для GameRow - в том же порядке
+GAME_ROW = (Game.id, Game.name, Game.author, Game.year)
+
+def game_rows(query: ModelSelect) -> List[GameRow]:
+    """Выполнить запрос к Game как список GameRow"""
+    return list(map(GameRow._make, query.select(*GAME_ROW).tuples()))
+
+class GameFTS(FTS5Model):
+    """
+    Полнотекстовый индекс (FTS5, trigram) по name / author для поиска подстроки
+    Содержимое берётся из таблицы game, синхронизируется триггерами
+    """
+    rowid = RowIDField()
+    name = SearchField()
+    author = SearchField()
+
+    class Meta:
+        database = db
+        table_name = 'game_fts'
+        options = {
+            'content': Game,
+            'content_rowid': Game.id,
+            'tokenize': 'trigram'
+        }
+
+GAME_FTS_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS game_fts_insert AFTER INSERT ON game BEGIN
+        INSERT INTO game_fts(rowid, name, author) VALUES (new.id, new.name, new.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS game_fts_delete AFTER DELETE ON game BEGIN
+        INSERT INTO game_fts(game_fts, rowid, name, author) VALUES ('delete', old.id, old.name, old.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS game_fts_update AFTER UPDATE OF name, author ON game BEGIN
+        INSERT INTO game_fts(game_fts, rowid, name, author) VALUES ('delete', old.id, old.name, old.author);
+        INSERT INTO game_fts(rowid, name, author) VALUES (new.id, new.name, new.author);
+    END""",
+)
+
+class AuthorFacet(Model):
+    """Количество игр каждого издателя, поддерживается триггерами"""
+    author = CharField(primary_key = True)
+    games = IntegerField()
 
     class Meta:
         database = db
+        table_name = 'game_author_facet'
+
+class YearFacet(Model):
+    """Количество игр каждого года, поддерживается триггерами"""
+    year = IntegerField(primary_key = True)
+    games = IntegerField()
+
+    class Meta:
+        database = db
+        table_name = 'game_year_facet'
+
+# счётчик +1 / -1 для значения колонки, пустые счётчики удаляются
+FACETS = (('author', 'game_author_facet'), ('year', 'game_year_facet'))
+FACET_INCREMENT = """INSERT INTO {table}({column}, games) VALUES (new.{column}, 1)
+        ON CONFLICT({column}) DO UPDATE SET games = games + 1;"""
+FACET_DECREMENT = """UPDATE {table} SET games = games - 1 WHERE {column} = old.{column};
+        DELETE FROM {table} WHERE {column} = old.{column} AND games <= 0;"""
+
+GAME_FACET_TRIGGERS = tuple(
+    trigger.format(column = column, table = table)
+    for column, table in FACETS
+    for trigger in (
+        """CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON game BEGIN
+        """ + FACET_INCREMENT + """
+    END""",
+        """CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON game BEGIN
+        """ + FACET_DECREMENT + """
+    END""",
+        """CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {column} ON game
+    WHEN old.{column} IS NOT new.{column} BEGIN
+        """ + FACET_DECREMENT + """
+        """ + FACET_INCREMENT + """
+    END""",
+    )
+)
+
+class CatalogVersion(Model):
+    """
+    Версия данных каталога (одна строка), +1 при каждом изменении game, поддерживается триггерами
+    В отличие от PRAGMA data_version общая для всех соединений и процессов - основа ETag HTTP API
+    """
+    id = IntegerField(primary_key = True)
+    version = IntegerField()
+
+    class Meta:
+        database = db
+        table_name = 'catalog_version'
+
+GAME_VERSION_TRIGGERS = tuple(
+    f"""CREATE TRIGGER IF NOT EXISTS catalog_version_{event} AFTER {event.upper()}{columns} ON game BEGIN
+        UPDATE catalog_version SET version = version + 1;
+    END"""
+    for event, columns in (('insert', ''), ('delete', ''), ('update', ' OF name, author, year'))
+)
+
+def catalog_version() -> int:
+    """Текущая версия данных каталога"""
+    return CatalogVersion.select(CatalogVersion.version).scalar() or 0
+
+# все модели базы, в порядке создания
+MODELS = (Game, GameFTS, AuthorFacet, YearFacet, CatalogVersion)
+
+FOLD_COLUMNS = ('name_fold', 'author_fold')
+
+def backfill_folds(database: Database) -> None:
+    """
+    Колонки name_fold / author_fold для базы, созданной до их появления,
+    и заполнение записей без них (запись мимо save() / folded()) одним UPDATE
+    """
+    columns = {column.name for column in database.get_columns(Game._meta.table_name)}
+    for column in FOLD_COLUMNS:
+        if column not in columns:
+            database.execute_sql(f'ALTER TABLE {Game._meta.table_name} ADD COLUMN {column} VARCHAR(255)')
+
+    if database.execute_sql('PRAGMA user_version').fetchone()[0] < FOLD_VERSION:
+        # формы посчитаны по старым правилам fold()
+        Game.update(name_fold = None, author_fold = None).execute()
+        database.execute_sql(f'PRAGMA user_version = {FOLD_VERSION}')
+
+    # fold() для sqlite - на время UPDATE в этом соединении
+    database.connection().create_function('fold', 1, fold, deterministic = True)
+    Game.update(name_fold = fn.fold(Game.name), author_fold = fn.fold(Game.author)).where(Game.name_fold.is_null()).execute()
+
+def create_schema(database: Database) -> None:
+    """Создать таблицы, индексы и триггеры синхронизации полнотекстового индекса, счётчиков и версии"""
+    game_exists = Game.table_exists()
+    fts_exists = GameFTS.table_exists()
+    facets_exist = AuthorFacet.table_exists() and YearFacet.table_exists()
+
+    with database.atomic():
+        if game_exists:
+            # до создания индексов: индексы по новым колонкам строятся по уже заполненным значениям
+            backfill_folds(database)
+        else:
+            database.execute_sql(f'PRAGMA user_version = {FOLD_VERSION}')
+        database.create_tables(MODELS)
+        for trigger in GAME_FTS_TRIGGERS + GAME_FACET_TRIGGERS + GAME_VERSION_TRIGGERS:
+            database.execute_sql(trigger)
+        CatalogVersion.insert(id = 1, version = 0).on_conflict_ignore().execute()
+
+        if not fts_exists:
+            # индекс создан для уже заполненной базы - проиндексировать существующие игры
+            GameFTS.rebuild()
+
+        if not facets_exist:
+            # счётчики для уже заполненной базы
+            for column, table in FACETS:
+                database.execute_sql(f"DELETE FROM {table}")
+                database.execute_sql(f"INSERT INTO {table}({column}, games) SELECT {column}, COUNT(*) FROM game GROUP BY {column}")
 
-db.connect()
-db.create_tables([Game])
\ No newline at end of file
+@db.attach_callback
+def on_database(database: Optional[Database]) -> None:
+    """Схема создаётся при подключении базы к моделям"""
+    if database is not None:
+        create_schema(database)
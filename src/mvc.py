@@ -1,27 +1,22 @@
-from typing import Any, List, Callable
-
-from src.inputs import InputManager
-from src.context import Localization, Context
-from src.utils import (
-    set_console_size, wait_key, nth_repl, 
-    KeyMap, ControlKey, LocalMemory, 
-    ViewPreparation, InputHandler, Navigator
-)
+import time
+import asyncio
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Callable, Optional
+from src.inputs import InputManager, IntRange
+from src.context import Localization, Context, Page, Question
+from src.render import FrameRenderer
+from src.router import Router
+from src.stats import FrameStats, FRAME
+from src.keyboard import KeyReader, KeyEvent, ControlKey, MOVES
 from src.exceptions import *
 
 class ContextStorage:
-    """Storage for Context, Model"""
-    def __new__(cls, *args, **kwargs):
-        it = cls.__dict__.get('__it__')
-        if it is not None:
-            return it 
-        cls.__it__ = it = object.__new__(cls)
-        it.init(*args, **kwargs)
-        return it
-    
-    def init(self, locale: Localization) -> None:
+    """Storage for Context, Model, one per session (console or telnet connection)"""
+    def __init__(self, locale: Optional[Localization] = None) -> None:
         self.context = Context()
-        self.action = None
+        self.action: Page = None
         self.locale = locale
 
 class GameModel:
@@ -57,14 +52,39 @@ class GameModel:
         try: self.cxt.context.memory.pop('year') 
         except: pass
 
+    def clear_results(self):
+        """Освободить курсоры списков и поиска и выбранную игру - они нужны только на своих страницах"""
+        for key in ('cursor', 'facets', 'live', 'query', 'current_game', 'game', 'back'):
+            self.cxt.context.memory.pop(key, None)
+
 class GameController:
     """Make operations with user, edit context, Controller"""
-    def __init__(self, cxt: ContextStorage, model: GameModel):
+    def __init__(self,
+                 cxt: ContextStorage,
+                 model: GameModel,
+                 router: Router = None,
+                 stats: FrameStats = None,
+                 executor: ThreadPoolExecutor = None,
+                 keys: KeyReader = None):
         self.cxt = cxt
         self.model = model
-        self.last_key = ''
-        self.navigators: List[Navigator] = []
-        self.inputs_validators: List[InputHandler] = []
+        # клавиатура консоли или клавиши сессии сервера
+        self.keys = keys if keys is not None else KeyReader()
+        # обработчики общие для всех сессий
+        self.router = router if router is not None else Router()
+        # замеры времени обработчиков, None - выключены
+        self.stats = stats
+        # навигаторы и валидаторы (работа с бд) выполняются вне event loop;
+        # пул потоков может быть общим для сессий сервера, поэтому обработчики
+        # одной сессии (поиск, prepare, навигатор) идут по одному под её блокировкой
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers = 1)
+        self.lock = threading.Lock()
+
+        # поиск по мере ввода: пауза в наборе перед запросом, текущая задача поиска
+        # и номер поколения запроса - результат устаревшего запроса отбрасывается
+        self.debounce = 0.1
+        self.search_task: Optional[asyncio.Task] = None
+        self.generation = 0
 
     # INPUT HANDLERS
     def register_inputs_validator(self, callback: Callable, on_page: str):
@@ -73,21 +93,15 @@ class GameController:
         Метод будет вызван когда все инпуты будут заполнены
         Инпуты сохраняются в памяти контекста
         """ 
-        self.inputs_validators.append(
-            InputHandler(
-                callback = callback,
-                on_page = on_page
-            )
-        )
+        self.router.add_inputs_validator(callback, on_page)
 
     def call_inputs_validator(self): 
         """Найти и вызвать инпут-валидатор, если не задан вызвать ошибку"""
-        for handler in self.inputs_validators:
-            if (handler.on_page == self.cxt.action.name):
-                return handler.callback(self)
-            
-        raise InputValidatorNotExist(f"Validator {self.cxt.action.name} not found")
-    
+        page = self.cxt.action.name
+        callback = self.router.inputs_validator(page)
+        if self.stats is None:
+            return callback(self)
+        return self.stats.call('validator', page, callback, self)
     
     def input_validator(self, on_page: str): 
         """Декоратор для создания валидатора как функции"""
@@ -103,22 +117,15 @@ class GameController:
         Зарегистрировать навигатор после нажатия заданной кнопки на заданной странице
         Метод должен перенаправить на следующую страницу
         """ 
-        self.navigators.append(
-            Navigator(
-                callback = callback,
-                page = page,
-                buttons = buttons
-            )
-        )
+        self.router.add_navigator(callback, page, buttons)
     
     def call_navigator(self) -> None:
         """Найти и вызвать навигатор, если не задан вызвать ошибку"""
-        for nav in self.navigators:
-            if (nav.page == self.cxt.action.name) and\
-               ((self.model.current_button in nav.buttons) or (not nav.buttons)):
-                return nav.callback(self)
-            
-        raise PageNotExist(f"Page {self.cxt.action.name} with button {self.model.current_button} not found")
+        page = self.cxt.action.name
+        callback = self.router.navigator(page, self.model.current_button)
+        if self.stats is None:
+            return callback(self)
+        return self.stats.call('navigator', page, callback, self)
     
     def navigator(self, page_from: str, buttons: List[int]):
         """Декоратор для создания навигатора как функции"""
@@ -128,33 +135,113 @@ class GameController:
             return callback
         return decorator
 
-    def press_key(self, key: str):
+    # LIVE SEARCH
+    def register_live_search(self, callback: Callable, on_page: str):
+        """
+        Зарегистрировать поиск по мере ввода для live страницы
+        Метод вызывается с текстом запроса и предыдущим результатом,
+        результат сохраняется в memory.live
+        """
+        self.router.add_live_search(callback, on_page)
+
+    def live_search(self, on_page: str):
+        """Декоратор для создания поиска по мере ввода как функции"""
+        def decorator(callback):
+            self.register_live_search(callback, on_page)
+
+            return callback
+        return decorator
+
+    def edit_query(self, event: KeyEvent) -> bool:
+        """Ввод текста запроса на live странице, False - нажатие не относится к тексту"""
+        memory = self.cxt.context.memory
+        if event.key == ControlKey.BACKSPACE:
+            memory.query = memory.get('query', '')[:-1]
+        elif event.printable:
+            # буквы не управляют выбором: перемещение только стрелками
+            memory.query = memory.get('query', '') + event.char
+        else:
+            return False
+        return True
+
+    def schedule_search(self):
+        """Запустить поиск после паузы в наборе, ещё не выполненный предыдущий отменяется"""
+        self.generation += 1
+        if self.search_task is not None:
+            self.search_task.cancel()
+        self.search_task = asyncio.ensure_future(
+            self.search(self.generation, self.cxt.action.name, self.cxt.context.memory.query)
+        )
+
+    async def flush_search(self):
+        """Выполнить ожидающий поиск сразу, без паузы: ENTER открывает строку из результатов набранного текста"""
+        if self.search_task is not None:
+            self.search_task.cancel()
+            self.search_task = None
+        self.generation += 1
+        await self.search(self.generation, self.cxt.action.name, self.cxt.context.memory.query, debounce = 0)
+
+    async def search(self, generation: int, page: str, text: str, debounce: Optional[float] = None):
+        """Поиск по мере ввода: результат сохраняется, если за время запроса текст не менялся"""
+        debounce = self.debounce if debounce is None else debounce
+        if debounce:
+            await asyncio.sleep(debounce)
+
+        callback = self.router.live_search(page)
+        previous = self.cxt.context.memory.get('live')
+        try:
+            if self.stats is None:
+                result = await self.run(callback, self, text, previous)
+            else:
+                result = await self.run(self.stats.call, 'search', page, callback, self, text, previous)
+        except Exception as e:
+            from loguru import logger
+            logger.exception(e)
+            return
+
+        if generation != self.generation:
+            # набран новый текст или сменилась страница
+            return
+        self.cxt.context.memory.live = result
+        self.model.current_page = 1
+        self.model.current_button = 1
+        # кадр ждёт нажатий - перерисовать с новыми результатами
+        self.keys.wake()
+
+    def set_locale(self, locale: Localization):
+        """Сменить язык, обработчики всех страниц проверяются при первой загрузке"""
+        self.router.compile(locale)
+        self.cxt.locale = locale
+
+    def press_key(self, event: KeyEvent):
         """
         Ивент нажатия на клавишу, вызвает действие если оно нужно
         """
-        arrow = (self.last_key + key).encode()
-        self.last_key = key
+        key = event.key
 
         if self.cxt.action.selectable:
-            if KeyMap.whatkey(key, arrow) == ControlKey.UP:
+            if key == ControlKey.UP:
                 self.model.set_button(self.model.current_button - 1)
 
-            elif KeyMap.whatkey(key, arrow) == ControlKey.DOWN:
+            elif key == ControlKey.DOWN:
                 self.model.set_button(self.model.current_button + 1)
 
         if self.cxt.action.horizontal: 
-            if KeyMap.whatkey(key, arrow) == ControlKey.LEFT:
+            if key == ControlKey.LEFT:
                 self.model.set_page(self.model.current_page - 1)
 
-            elif KeyMap.whatkey(key, arrow) == ControlKey.RIGHT:
+            elif key == ControlKey.RIGHT:
                 self.model.set_page(self.model.current_page + 1)
 
-        if KeyMap.whatkey(key) == ControlKey.ESC:
+        if key == ControlKey.ESC:
             self.set_action(self.cxt.locale.main)
 
-        elif KeyMap.whatkey(key) == ControlKey.ENTER:
+        elif key == ControlKey.ENTER:
             self.call_navigator()
 
+        elif key == ControlKey.STATS and self.stats is not None:
+            self.stats.toggle()
+
 
         # Ивент нажатия на кнопку
         # Если пользователь нажал на кнопку то изменить параметры модели
@@ -164,17 +251,18 @@ class GameController:
         # Если нажал ESC вернуться в меню
         # Если нажал на ENTER то выполнить действие
 
-    def input_value(self, value: Any, question: LocalMemory):
+    def input_value(self, value: Any, question: Question):
         """Ивент ввода значения, валидация и выход в меню если требуется"""
         if isinstance(value, tuple):
-            if (value[0] != '' and question.nullable is False) and value[0] != '-':
-                self.cxt.context.memory.error = question.error
-                return
-            
-            elif value[0].strip() == '-':
+            if value[0].strip() == '-':
                 self.set_action(self.cxt.locale.main)
                 return
 
+            elif value[0] != '' or question.nullable is False:
+                # ошибка валидации, пустое значение допустимо только для nullable
+                self.cxt.context.memory.error = question.error
+                return
+
             else:
                 value = value[0]
 
@@ -198,28 +286,86 @@ class GameController:
         # Если значение было запрошено и не было ошибки при вводе, то записать значение и поменять состояние на следующий запрос
         # Если была ошибка то записать её и вернуть ошибку
 
-    def request(self):
+    async def run(self, callback: Callable, *args) -> Any:
+        """Выполнить обработчик в отдельном потоке, ввод с клавиатуры продолжает читаться"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.serial, callback, *args)
+
+    def serial(self, callback: Callable, *args) -> Any:
+        """Обработчик сессии в потоке пула: отменённый поиск ещё может выполняться, следующий ждёт его"""
+        with self.lock:
+            return callback(*args)
+
+    def move(self, button: int = 0, page: int = 0):
+        """Сдвинуть выбранную кнопку / страницу сразу на несколько позиций"""
+        if button and self.cxt.action.selectable:
+            self.model.set_button(self.model.current_button + button)
+        if page and self.cxt.action.horizontal:
+            self.model.set_page(self.model.current_page + page)
+
+    async def press_keys(self, events: List[KeyEvent]):
         """
-        Запрос к контроллеру на выполнение нужного действия на странице
-        Ожидания ввода или нажатия клавиши
+        Обработать накопившиеся нажатия
+        Подряд идущие перемещения по одной оси схлопываются в одно изменение модели:
+        40 нажатий вправо = один set_page
+        На live странице печатные символы и backspace меняют текст запроса
         """
-        if self.cxt.action.input:
-            question = self.cxt.action.questions[self.cxt.context.memory.step]
-            match question.type:
-                case 'int':
-                    t = int
-                case 'str':
-                    t = str 
-
-            value = InputManager.get_input(t, lambda v, err: (v, err))
-            self.input_value(value, question)
+        moves = {'button': 0, 'page': 0}
+        edited = False
+        for event in events:
+            if self.cxt.action.live and self.edit_query(event):
+                edited = True
+                continue
+
+            move = MOVES.get(event.key)
+            if move:
+                axis, step = move
+                other = 'page' if axis == 'button' else 'button'
+                if moves[other]:
+                    # смена оси - применить накопленное по другой
+                    self.move(**{other: moves[other]})
+                    moves[other] = 0
+                moves[axis] += step
+                continue
+
+            if event.key == ControlKey.ENTER and self.cxt.action.live and (
+                    edited or (self.search_task is not None and not self.search_task.done())):
+                # текст набран в этой пачке или поиск ещё ждёт паузы - сначала результаты для него
+                await self.flush_search()
+                edited = False
+
+            self.move(**moves)
+            moves = {'button': 0, 'page': 0}
+
+            if event.key == ControlKey.ENTER:
+                await self.run(self.call_navigator)
+            else:
+                self.press_key(event)
 
-        else:
-            # ожидать нажатия клавиши
-            key = wait_key()
-            self.press_key(key)
+            if self.cxt.action.input:
+                # страница сменилась на страницу ввода, остальные нажатия не относятся к ней
+                return
 
-    def set_action(self, locale: dict):
+        self.move(**moves)
+        if edited and self.cxt.action.live:
+            # все символы пачки - один запрос
+            self.schedule_search()
+
+    async def request_input(self):
+        """Запросить ввод значения на странице ввода"""
+        question = self.cxt.action.questions[self.cxt.context.memory.step]
+        match question.type:
+            case 'int':
+                t = int
+            case 'str':
+                t = str 
+            case 'range':
+                t = IntRange
+
+        text = await self.keys.read_line()
+        value = InputManager.get_input(t, lambda v, err: (v, err), debug_value = text)
+        await self.run(self.input_value, value, question)
+
+    def set_action(self, locale: Page):
         # Сменить состояние всей системы
         # поменять текущую страницу
         self.model.clear_temp()
@@ -227,15 +373,21 @@ class GameController:
         self.model.current_page = 1
         self.cxt.context.memory.error = ''
         self.cxt.context.memory.step = 0
+        # результаты поиска, начатого на прошлой странице, не нужны
+        self.generation += 1
 
         if self.cxt.action and self.cxt.action.name == "main":
             self.cxt.context.storage.status = ''
 
+        if locale.name == "main":
+            # из меню списки открываются заново
+            self.model.clear_results()
+
         self.cxt.action = locale
         if self.cxt.action.selectable and self.cxt.action.actions:
             self.model.max_button = self.cxt.action.actions
 
-        self.cxt.context.set(locale.text)
+        self.cxt.context.set(locale.template)
 
 class GameView:
     """Print page with current context, View"""
@@ -243,21 +395,17 @@ class GameView:
         self.cxt = cxt
         self.model = model
         self.controller = controller
-        self.preparation_handlers: List[ViewPreparation] = []
+        # общие с контроллером замеры, None - выключены
+        self.stats = controller.stats
+        # разметка таблицы для каждого набора результатов (PageCursor), пока он в памяти
+        self.tables = weakref.WeakKeyDictionary()
+        self.renderer = FrameRenderer(width = 70)
+        # максимальная частота отрисовки
+        self.fps = 60
 
     def register_preparation(self, callback: Callable, key: str): 
         """Зарегистрировать предварительный обработчик данных из конфига страницы"""
-        self.preparation_handlers.append(
-            ViewPreparation(
-                callback = callback,
-                key = key
-            )
-        )
-    def call_preparation(self, key: str): 
-        """Вызвать предварительный обработчик данных если он существует для данного ключа"""
-        for preparation in self.preparation_handlers:
-            if (preparation.key == key):
-                return preparation.callback(self)
+        self.controller.router.add_preparation(callback, key)
     
     def view_preparation(self, key: str): 
         """Декоратор для создания предварительного обработчика как функции"""
@@ -270,19 +418,41 @@ class GameView:
 
     def show(self):
         """Главная функция отрисовки страницы"""
-        for key, value in self.cxt.action.items():
-            if value:
-                # вызов предварительного обработчика если есть значение
-                self.call_preparation(key)
-
-        if self.cxt.action.selectable: 
-            # отобразить текущую выбранную кнопку если страница поддерживает кнопки
-            # replace selected button
-            self.cxt.context.text = nth_repl(self.cxt.context.text, '{select}', '[>]', self.model.current_button)
-            # replace other buttons
-            self.cxt.context.text = self.cxt.context.text.replace('{select}', '   ',)
-        
-        if '{status}' in self.cxt.context.text:
+        if self.stats is None:
+            return self.draw()
+        start = time.perf_counter()
+        try:
+            return self.draw()
+        finally:
+            self.stats.record(FRAME, (time.perf_counter() - start) * 1000)
+
+    async def show_async(self):
+        """
+        Кадр в цикле событий: подготовка (запросы к базе курсоров) - в потоке обработчиков,
+        как и сами обработчики, кадр рисуется, когда данные готовы - другие сессии сервера не ждут
+        """
+        start = time.perf_counter()
+        await self.controller.run(self.prepare)
+        self.paint()
+        if self.stats is not None:
+            self.stats.record(FRAME, (time.perf_counter() - start) * 1000)
+
+    def draw(self):
+        """Подготовить и отрисовать кадр текущей страницы"""
+        self.prepare()
+        self.paint()
+
+    def prepare(self):
+        """Предварительные обработчики для ключей конфига страницы с непустым значением"""
+        for preparation in self.controller.router.page_preparation(self.cxt.action):
+            if self.stats is None:
+                preparation(self)
+            else:
+                self.stats.call('prepare', self.cxt.action.name, preparation, self)
+
+    def paint(self):
+        """Отрисовать кадр по подготовленному контексту"""
+        if 'status' in self.cxt.context.template.names:
             # Замена статуса, если не указан то поставить пустой, если указан то поставить '* ' перед ним
             if not self.cxt.context.storage.get('status'):
                 # set status after first start for avoid error
@@ -290,36 +460,45 @@ class GameView:
             elif not self.cxt.context.storage['status'].startswith('* '):
                 self.cxt.context.storage['status'] = '* ' + self.cxt.context.storage['status']
         
-        # взять баннер для текущей локализации и удалить с него "
+        # баннер текущей локализации, кавычки убраны при загрузке
         banner = self.cxt.locale.banner
-        if banner.strip().startswith('"') and\
-           banner.strip().endswith('"'):
-            banner = banner.strip()[1:-1]
-
-        # посчитать количество строк для отображения, подогнать под них размер консоли
-        rows = (banner + self.cxt.context.text).split('\n')
-        # если на странице есть инпут, то добавить 1 строку
-        len_rows = len(rows) + (1 if self.cxt.action.input else 0)
-        if self.cxt.context.memory.last_size != len_rows:
-            self.cxt.context.memory.last_size = len_rows
-            set_console_size(70, len_rows)
-
-        # отобразить баннер и страницу
-        print(banner)
-        self.cxt.context.show(endless = self.cxt.action.input) # if input is true = endless mode
-
-        # set previous text for clear all edits
-        self.cxt.context.text = self.cxt.action.text 
-    
-    def clear(self):
-        # очистить консоль
-        self.cxt.context.clear_console()
 
-    def run_loop(self, first_page: Localization):
+        # отобразить текущую выбранную кнопку если страница поддерживает кнопки
+        text = self.cxt.context.render(select = self.model.current_button if self.cxt.action.selectable else 0)
+
+        if self.stats is not None and self.stats.overlay and not self.cxt.action.input:
+            # на странице ввода курсор стоит в конце последней строки - там строки статистики нет
+            text += '\n' + self.stats.overlay_line()
+
+        # отобразить баннер и страницу, перерисовываются только изменённые строки
+        # размер консоли подгоняется под количество строк, если на странице есть инпут - +1 строка
+        self.renderer.render(banner + '\n' + text, input_line = self.cxt.action.input)
+
+    async def run_loop(self, first_page: Page):
         # запустить главный луп программы
+        self.controller.set_locale(self.cxt.locale)
         self.controller.set_action(first_page)
 
-        while True:
-            self.show()
-            self.controller.request()
-            self.clear()
\ No newline at end of file
+        try:
+            # терминал в raw режиме на всю сессию, клавиши читаются в очередь
+            with self.controller.keys.attach(asyncio.get_running_loop()) as keys:
+                while True:
+                    await self.show_async()
+                    frame = time.perf_counter()
+
+                    if self.cxt.action.input:
+                        await self.controller.request_input()
+                        continue
+
+                    # все нажатия, накопившиеся пока рисовался кадр, обрабатываются вместе
+                    await self.controller.press_keys(await keys.events())
+
+                    # не чаще fps кадров: нажатия во время ожидания попадают в этот же кадр
+                    while not self.cxt.action.input and \
+                          (delay := frame + 1 / self.fps - time.perf_counter()) > 0:
+                        await asyncio.sleep(delay)
+                        await self.controller.press_keys(keys.drain())
+        finally:
+            self.renderer.close()
+            if self.stats is not None:
+                self.stats.log()
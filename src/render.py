@@ -0,0 +1,102 @@
+import os
+import sys
+from typing import List, Optional, TextIO
+
+# ANSI / VT100 escape sequences
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+CLEAR_LINE = '\x1b[K'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+
+def move_to(row: int, col: int = 1) -> str:
+    """Переместить курсор, нумерация с 1"""
+    return f'\x1b[{row};{col}H'
+
+def resize(width: int, height: int) -> str:
+    """Изменить размер окна терминала (xterm window manipulation)"""
+    return f'\x1b[8;{height};{width}t'
+
+def enable_vt_mode() -> None:
+    """Включить обработку ANSI последовательностей в консоли Windows"""
+    if os.name != 'nt':
+        return
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11) # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        kernel32.SetConsoleMode(handle, mode.value | 0x0004) # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+
+class FrameRenderer:
+    """
+    Double-buffered terminal renderer
+    Compares new frame with the previous one and redraws only changed lines,
+    all output of the frame is sent with one write
+    """
+    def __init__(self, stream: Optional[TextIO] = None, width: int = 70) -> None:
+        self.stream = stream
+        self.width = width
+        # строки, которые сейчас на экране, None - экран неизвестен (нужна полная отрисовка)
+        self.lines: Optional[List[str]] = None
+        self.height: Optional[int] = None
+        # консоль настраивается перед первым кадром, а не при создании
+        self.vt_mode = False
+
+    def invalidate(self) -> None:
+        """Следующий кадр будет отрисован полностью"""
+        self.lines = None
+
+    def diff(self, lines: List[str], height: int) -> List[str]:
+        """Последовательности для перехода с предыдущего кадра на новый"""
+        out = []
+        if height != self.height:
+            # размер окна под количество строк страницы
+            self.height = height
+            self.lines = None
+            out.append(resize(self.width, height))
+
+        previous = self.lines
+        if previous is None:
+            out.append(CLEAR_SCREEN)
+            previous = []
+
+        for number, line in enumerate(lines):
+            if number >= len(previous) or previous[number] != line:
+                out.append(move_to(number + 1) + line + CLEAR_LINE)
+
+        # стереть строки, оставшиеся от более длинного кадра
+        for number in range(len(lines), len(previous)):
+            out.append(move_to(number + 1) + CLEAR_LINE)
+
+        return out
+
+    def render(self, frame: str, input_line: bool = False) -> str:
+        """
+        Отрисовать кадр
+        input_line - после кадра будет input(): курсор ставится в конец последней строки,
+        после ввода экран изменён пользователем, поэтому следующий кадр рисуется полностью
+        """
+        lines = frame.split('\n')
+        out = self.diff(lines, len(lines) + (1 if input_line else 0))
+
+        if input_line:
+            out.append(move_to(len(lines), len(lines[-1]) + 1) + SHOW_CURSOR)
+            self.lines = None
+        else:
+            out.append(HIDE_CURSOR)
+            self.lines = lines
+
+        data = ''.join(out)
+        if not self.vt_mode:
+            enable_vt_mode()
+            self.vt_mode = True
+        stream = self.stream or sys.stdout
+        stream.write(data)
+        stream.flush()
+        return data
+
+    def close(self) -> None:
+        """Вернуть курсор под последний кадр"""
+        stream = self.stream or sys.stdout
+        stream.write(move_to(self.height or 1) + SHOW_CURSOR + '\n')
+        stream.flush()
@@ -0,0 +1,105 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.context import Localization, Page
+from src.exceptions import PageNotExist, InputValidatorNotExist
+
+class Router:
+    """
+    Dispatch tables of navigators, input validators and view preparations
+    Navigators: (page, button) -> callback, (page, ANY) - any button of the page
+    Live searches: page -> callback, runs while the user types on a live page
+    Preparations of every page are resolved once in compile()
+    """
+    ANY = None
+
+    def __init__(self) -> None:
+        self.navigators: Dict[Tuple[str, Optional[int]], Callable] = {}
+        self.inputs_validators: Dict[str, Callable] = {}
+        self.preparations: Dict[str, Callable] = {}
+        self.live_searches: Dict[str, Callable] = {}
+
+        # скомпилированные обработчики страниц и проверенные локализации
+        self.page_preparations: Dict[Page, Tuple[Callable, ...]] = {}
+        self.compiled: List[Localization] = []
+
+    # REGISTRATION
+    def add_navigator(self, callback: Callable, page: str, buttons: List[int]) -> None:
+        """Навигатор для кнопок страницы, пустой список - любая кнопка"""
+        for button in (buttons or [Router.ANY]):
+            # как и раньше, срабатывает первый зарегистрированный навигатор
+            self.navigators.setdefault((page, button), callback)
+
+    def add_inputs_validator(self, callback: Callable, on_page: str) -> None:
+        self.inputs_validators.setdefault(on_page, callback)
+
+    def add_preparation(self, callback: Callable, key: str) -> None:
+        self.preparations.setdefault(key, callback)
+
+    def add_live_search(self, callback: Callable, on_page: str) -> None:
+        self.live_searches.setdefault(on_page, callback)
+
+    # DISPATCH
+    def navigator(self, page: str, button: int) -> Callable:
+        """Навигатор для кнопки страницы"""
+        callback = self.navigators.get((page, button)) or self.navigators.get((page, Router.ANY))
+        if callback is None:
+            raise PageNotExist(f"Page {page} with button {button} not found")
+        return callback
+
+    def inputs_validator(self, page: str) -> Callable:
+        """Инпут-валидатор страницы"""
+        callback = self.inputs_validators.get(page)
+        if callback is None:
+            raise InputValidatorNotExist(f"Validator {page} not found")
+        return callback
+
+    def live_search(self, page: str) -> Callable:
+        """Поиск по мере ввода на странице"""
+        callback = self.live_searches.get(page)
+        if callback is None:
+            raise PageNotExist(f"Live search for {page} not found")
+        return callback
+
+    def page_preparation(self, page: Page) -> Tuple[Callable, ...]:
+        """Предварительные обработчики страницы: для ключей конфига с непустым значением"""
+        preparations = self.page_preparations.get(page)
+        if preparations is None:
+            preparations = self.page_preparations[page] = tuple(
+                self.preparations[key] for key, value in page.items()
+                if value and key in self.preparations
+            )
+        return preparations
+
+    # COMPILE
+    def compile(self, locale: Localization) -> None:
+        """
+        Проверить, что у всех страниц локализации есть обработчики, и подготовить их
+        Вызывается один раз при загрузке локализации
+        """
+        if any(locale is compiled for compiled in self.compiled):
+            return
+
+        missing = []
+        for page in vars(locale).values():
+            if not isinstance(page, Page):
+                continue
+
+            self.page_preparation(page)
+
+            if page.live and page.name not in self.live_searches:
+                missing.append(f"live search for {page.name}")
+
+            if page.input:
+                if page.name not in self.inputs_validators:
+                    missing.append(f"validator for {page.name}")
+
+            elif page.selectable:
+                buttons = range(1, page.actions + 1) if page.actions else [Router.ANY]
+                for button in buttons:
+                    if (page.name, button) not in self.navigators and (page.name, Router.ANY) not in self.navigators:
+                        missing.append(f"navigator for {page.name} button {button if button else 'any'}")
+
+        if missing:
+            raise PageNotExist(f"Locale {locale.language} has pages without handlers: {', '.join(missing)}")
+
+        self.compiled.append(locale)
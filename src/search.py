@@ -0,0 +1,227 @@
+from collections import Counter
+from typing import List, Optional, Set, Tuple, Union
+
+from peewee import ModelSelect, fn
+
+from src.inputs import IntRange
+from src.models import Game, GameFTS, fold
+
+# минимальная длина подстроки, которую может найти trigram индекс
+MIN_FTS_LENGTH = 3
+
+# нечёткий поиск: сколько записей читается по одной триграмме запроса,
+# сколько кандидатов переранжируется и минимальная доля совпавших триграмм запроса
+FUZZY_POSTINGS = 5000
+FUZZY_CANDIDATES = 200
+FUZZY_SIMILARITY = 0.25
+
+# поиск по мере ввода: сколько первых по name игр хранится как кандидаты
+LIVE_CANDIDATES = 1000
+
+def trigrams(text: str) -> Set[str]:
+    """Триграммы текста, как их выделяет trigram токенайзер FTS5 (без учёта регистра)"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def similarity(query: Set[str], value: Set[str]) -> Tuple[float, float]:
+    """Доля триграмм запроса, найденных в значении, и коэффициент Жаккара"""
+    if not query:
+        return 0.0, 0.0
+    common = len(query & value)
+    return common / len(query), common / len(query | value)
+
+class TextFilter:
+    """
+    Текстовый фильтр из ввода пользователя:
+        name   - точное совпадение (без учёта регистра и диакритики)
+        name*  - начинается с name (без учёта регистра и диакритики)
+        *name* - содержит name
+        ~name  - похоже на name (с опечатками)
+    VERBATIM задаётся только явно: значение как в базе, с учётом регистра (выбор издателя на странице счётчиков)
+    """
+    EXACT = 'exact'
+    PREFIX = 'prefix'
+    CONTAINS = 'contains'
+    FUZZY = 'fuzzy'
+    VERBATIM = 'verbatim'
+
+    def __init__(self, value: str, mode: Optional[str] = None) -> None:
+        if mode is not None:
+            # режим задан явно - значение не разбирается
+            self.mode, self.value = mode, value
+            return
+
+        value = value.strip()
+        if value.startswith('~') and len(value[1:].strip()) >= MIN_FTS_LENGTH:
+            self.mode, self.value = TextFilter.FUZZY, value[1:].strip()
+        elif len(value) > 2 and value.startswith('*') and value.endswith('*'):
+            self.mode, self.value = TextFilter.CONTAINS, value[1:-1]
+        elif len(value) > 1 and value.endswith('*'):
+            self.mode, self.value = TextFilter.PREFIX, value[:-1]
+        else:
+            self.mode, self.value = TextFilter.EXACT, value
+
+    @property
+    def indexed(self) -> bool:
+        """Можно ли выполнить фильтр по B-tree индексу"""
+        return self.mode in (TextFilter.EXACT, TextFilter.PREFIX, TextFilter.VERBATIM)
+
+    @property
+    def folded(self) -> bool:
+        """Сравнение с формой fold() значения"""
+        return self.mode in (TextFilter.EXACT, TextFilter.PREFIX)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        # "Doom" и "DOOM" - один запрос для точного и префиксного поиска
+        return self.mode, fold(self.value) if self.folded else self.value
+
+    def column(self, column: str):
+        """Колонка game для фильтра: точный и префиксный поиск - по индексу формы fold()"""
+        return getattr(Game, f'{column}_fold' if self.folded else column)
+
+    def expression(self, field):
+        """Условие для колонки таблицы game (для EXACT / PREFIX - колонки *_fold)"""
+        if self.mode == TextFilter.VERBATIM:
+            return field == self.value
+        if self.mode == TextFilter.EXACT:
+            return field == fold(self.value)
+        if self.mode == TextFilter.PREFIX:
+            # диапазон вместо LIKE - так sqlite использует индекс по колонке,
+            # unlikely() не даёт планировщику выбрать обход по id ради ORDER BY курсора
+            value = fold(self.value)
+            return fn.unlikely(field >= value) & fn.unlikely(field < value + '\U0010ffff')
+        return field.contains(self.value)
+
+    def fts_expression(self, column: str) -> str:
+        """Выражение MATCH для trigram индекса: фраза = поиск подстроки"""
+        return f'{column} : "' + self.value.replace('"', '""') + '"'
+
+class GameSearch:
+    """
+    Поиск игр по фильтрам страницы find_game
+    Выбирает план запроса: индексы по name / author / year,
+    trigram индекс для подстроки или полный просмотр, если ничего не подходит
+    """
+    INDEX = 'index'
+    FTS = 'fts'
+    FUZZY = 'fuzzy'
+    SCAN = 'scan'
+
+    def __init__(self,
+                 name: Union[str, TextFilter, None] = None,
+                 author: Union[str, TextFilter, None] = None,
+                 year: Union[int, IntRange, None] = None) -> None:
+        self.name = self.text_filter(name)
+        self.author = self.text_filter(author)
+        self.year = IntRange(year, year) if isinstance(year, int) else year
+
+    @staticmethod
+    def text_filter(value: Union[str, TextFilter, None]) -> Optional[TextFilter]:
+        if isinstance(value, TextFilter) or value is None:
+            return value
+        return TextFilter(value) if value else None
+
+    @property
+    def filters(self) -> Tuple[Tuple[str, TextFilter], ...]:
+        return tuple((column, text) for column, text in (('name', self.name), ('author', self.author)) if text)
+
+    @property
+    def key(self) -> Tuple:
+        """Нормализованные фильтры - ключ кэша результатов"""
+        return (
+            self.name.key if self.name else None,
+            self.author.key if self.author else None,
+            (self.year.start, self.year.end) if self.year else None,
+        )
+
+    @property
+    def plan(self) -> str:
+        """План выполнения поиска для заданных фильтров"""
+        if any(text.mode == TextFilter.FUZZY for _, text in self.filters):
+            # кандидаты из trigram индекса, результат сортируется по схожести
+            return GameSearch.FUZZY
+        if any(text.indexed for _, text in self.filters):
+            # выборка по индексу name / author узкая, подстрока проверяется на ней
+            return GameSearch.INDEX
+        if any(len(text.value) >= MIN_FTS_LENGTH for _, text in self.filters):
+            return GameSearch.FTS
+        if self.year:
+            return GameSearch.INDEX
+        return GameSearch.SCAN
+
+    def query(self) -> ModelSelect:
+        """Собрать запрос к Game"""
+        query = Game.select()
+        plan = self.plan
+
+        matches = []
+        for column, text in self.filters:
+            if text.mode == TextFilter.FUZZY:
+                # применяется в ranked()
+                continue
+            if plan == GameSearch.FTS and text.mode == TextFilter.CONTAINS and len(text.value) >= MIN_FTS_LENGTH:
+                matches.append(text.fts_expression(column))
+            else:
+                query = query.where(text.expression(text.column(column)))
+
+        if matches:
+            rowids = GameFTS.select(GameFTS.rowid).where(GameFTS.match(' AND '.join(matches)))
+            query = query.where(Game.id.in_(rowids))
+
+        if self.year:
+            query = query.where(Game.year.between(self.year.start, self.year.end))
+
+        return query
+
+    def candidates(self, column: str, text: TextFilter) -> Counter:
+        """
+        Кандидаты нечёткого поиска: id записей и количество общих с запросом триграмм
+        По каждой триграмме читается не больше FUZZY_POSTINGS записей, частые триграммы
+        (есть в большем числе записей) учитываются, только если редких нет
+        """
+        database = GameFTS._meta.database
+        table = GameFTS._meta.table_name
+        postings = f'SELECT rowid FROM {table} WHERE {table} MATCH ? LIMIT {FUZZY_POSTINGS + 1}'
+
+        rare, common = [], []
+        for trigram in trigrams(text.value):
+            expression = f'{column} : "' + trigram.replace('"', '""') + '"'
+            found = database.execute_sql(f'SELECT COUNT(*) FROM ({postings})', (expression,)).fetchone()[0]
+            # триграммы с опечаткой не встречаются нигде и не участвуют
+            if found:
+                (rare if found <= FUZZY_POSTINGS else common).append(expression)
+
+        expressions = rare or common
+        if not expressions:
+            return Counter()
+
+        # количество совпавших триграмм считается в sqlite, в python попадают только лучшие
+        union = ' UNION ALL '.join(f'SELECT * FROM ({postings})' for _ in expressions)
+        rows = database.execute_sql(
+            f'SELECT rowid, COUNT(*) AS matched FROM ({union}) GROUP BY rowid ORDER BY matched DESC LIMIT {FUZZY_CANDIDATES}',
+            expressions
+        )
+        return Counter(dict(rows.fetchall()))
+
+    def ranked(self) -> List[int]:
+        """id найденных игр от самой похожей, с учётом остальных фильтров"""
+        fuzzy = [(column, text) for column, text in self.filters if text.mode == TextFilter.FUZZY]
+        counts = Counter()
+        for column, text in fuzzy:
+            counts.update(self.candidates(column, text))
+        ids = [rowid for rowid, _ in counts.most_common(FUZZY_CANDIDATES)]
+
+        wanted = [(column, trigrams(text.value)) for column, text in fuzzy]
+        scored = []
+        query = self.query().select(Game.id, Game.name, Game.author).where(Game.id.in_(ids))
+        for game_id, name, author in query.tuples():
+            values = {'name': name, 'author': author}
+            scores = [similarity(grams, trigrams(values[column])) for column, grams in wanted]
+            contained = sum(score[0] for score in scores) / len(scores)
+            jaccard = sum(score[1] for score in scores) / len(scores)
+            if contained >= FUZZY_SIMILARITY:
+                scored.append((-contained, -jaccard, game_id))
+
+        scored.sort()
+        return [game_id for _, _, game_id in scored]
@@ -0,0 +1,176 @@
+import asyncio
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from src.context import Localization
+from src.keyboard import KeyReader, KeyEvent, ControlKey
+from src.render import FrameRenderer
+from src.router import Router
+from src.mvc import ContextStorage, GameModel, GameController, GameView
+
+# telnet: команды и опции, которые нужны для посимвольного ввода
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+ECHO, SGA = 1, 3
+# эхо делает сервер, go ahead не используется - клиент отправляет каждую клавишу сразу
+NEGOTIATION = bytes((IAC, WILL, ECHO, IAC, WILL, SGA, IAC, DO, SGA))
+
+class TelnetParser:
+    """Remove telnet commands from the input stream, the state is kept between reads"""
+    DATA, COMMAND, OPTION, SUBNEGOTIATION, SUBNEGOTIATION_IAC = range(5)
+
+    def __init__(self) -> None:
+        self.state = TelnetParser.DATA
+        # после \r клиент отправляет \n или \0 - это та же клавиша enter
+        self.cr = False
+
+    def feed(self, data: bytes) -> bytes:
+        out = bytearray()
+        for byte in data:
+            if self.state == TelnetParser.DATA:
+                if byte == IAC:
+                    self.state = TelnetParser.COMMAND
+                elif self.cr and byte in (0, 10):
+                    pass
+                else:
+                    out.append(byte)
+                self.cr = byte == 13
+            elif self.state == TelnetParser.COMMAND:
+                if byte == IAC:
+                    # экранированный байт 255
+                    out.append(byte)
+                    self.state = TelnetParser.DATA
+                elif byte in (WILL, WONT, DO, DONT):
+                    self.state = TelnetParser.OPTION
+                elif byte == SB:
+                    self.state = TelnetParser.SUBNEGOTIATION
+                else:
+                    self.state = TelnetParser.DATA
+            elif self.state == TelnetParser.OPTION:
+                # ответы на согласование опций не нужны
+                self.state = TelnetParser.DATA
+            elif self.state == TelnetParser.SUBNEGOTIATION:
+                if byte == IAC:
+                    self.state = TelnetParser.SUBNEGOTIATION_IAC
+            else:
+                self.state = TelnetParser.DATA if byte == SE else TelnetParser.SUBNEGOTIATION
+        return bytes(out)
+
+class SessionStream:
+    """Output of the frame renderer into the connection: text -> utf-8, \\n -> \\r\\n"""
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+
+    def write(self, text: str) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(text.replace('\n', '\r\n').encode('utf-8'))
+
+    def flush(self) -> None:
+        # transport отправляет данные сам, без ожидания
+        pass
+
+class SessionKeys(KeyReader):
+    """
+    Keys of one telnet session: bytes from the connection instead of stdin
+    On input pages the line is collected here with echo, as the terminal does for input()
+    """
+    def __init__(self, stream: SessionStream) -> None:
+        super().__init__()
+        self.stream = stream
+        self.telnet = TelnetParser()
+        # строка страницы ввода, None - режим клавиш
+        self.line: Optional[List[str]] = None
+        self.line_done: Optional[asyncio.Future] = None
+
+    @contextmanager
+    def attach(self, loop: asyncio.AbstractEventLoop) -> Iterator['SessionKeys']:
+        # терминал настраивает клиент, данные приходят через feed()
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        yield self
+
+    def feed(self, data: bytes) -> None:
+        """Байты от клиента"""
+        for event in self.decoder.feed(self.utf8.decode(self.telnet.feed(data))):
+            if self.line is None:
+                self.queue.put_nowait(event)
+            else:
+                self.edit_line(event)
+
+    def close(self) -> None:
+        """Соединение закрыто"""
+        if self.line_done is not None and not self.line_done.done():
+            self.line_done.set_exception(EOFError("connection is closed"))
+        self.queue.put_nowait(None)
+
+    def edit_line(self, event: KeyEvent) -> None:
+        if event.key == ControlKey.ENTER:
+            self.stream.write('\n')
+            self.line_done.set_result(''.join(self.line))
+            self.line = None
+        elif event.key == ControlKey.BACKSPACE:
+            if self.line:
+                self.line.pop()
+                self.stream.write('\b \b')
+        elif event.printable:
+            self.line.append(event.char)
+            self.stream.write(event.char)
+
+    async def read_line(self) -> str:
+        self.line = []
+        self.line_done = self.loop.create_future()
+        return await self.line_done
+
+class GameServer:
+    """
+    Telnet server: every connection gets its own ContextStorage, GameModel,
+    GameController and GameView on one event loop
+    Handlers (router), database pool, results cache and locales are shared by all sessions
+    """
+    def __init__(self, router: Router, first_locale: Localization, workers: int = 8) -> None:
+        self.router = router
+        self.first_locale = first_locale
+        # обработчики всех сессий в одном пуле потоков: соединений с базой не больше, чем потоков
+        self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'session')
+        self.sessions = 0
+
+    def session(self, writer: asyncio.StreamWriter) -> GameView:
+        """MVC новой сессии"""
+        cxt = ContextStorage(self.first_locale)
+        model = GameModel(cxt)
+        stream = SessionStream(writer)
+        controller = GameController(cxt, model, router = self.router, executor = self.executor, keys = SessionKeys(stream))
+        view = GameView(cxt, model, controller)
+        view.renderer = FrameRenderer(stream = stream, width = view.renderer.width)
+        return view
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        view = self.session(writer)
+        keys: SessionKeys = view.controller.keys
+        writer.write(NEGOTIATION)
+        self.sessions += 1
+
+        async def read():
+            try:
+                while data := await reader.read(1024):
+                    keys.feed(data)
+            except ConnectionError:
+                pass
+            keys.close()
+
+        reading = asyncio.ensure_future(read())
+        try:
+            await view.run_loop(self.first_locale.select_language)
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            self.sessions -= 1
+            reading.cancel()
+            writer.close()
+
+    async def serve(self, host: str, port: int, on_start = None) -> None:
+        server = await asyncio.start_server(self.handle, host, port, backlog = 1024)
+        if on_start:
+            on_start(server)
+        async with server:
+            await server.serve_forever()
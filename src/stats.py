@@ -0,0 +1,88 @@
+import math
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# ключ серии: фаза, обработчик, страница
+Key = Tuple[str, str, str]
+
+FRAME: Key = ('frame', 'show', '*')
+
+class RingBuffer:
+    """Last `size` values, older ones are overwritten"""
+    def __init__(self, size: int) -> None:
+        self.values = array('d', bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.values[:self.count])
+
+    def percentiles(self, *points: float) -> List[float]:
+        """Перцентили (nearest rank) по значениям в буфере"""
+        if not self.count:
+            return [0.0 for _ in points]
+        values = sorted(self)
+        return [values[max(0, math.ceil(point / 100 * self.count) - 1)] for point in points]
+
+class FrameStats:
+    """
+    Timings of frame phases: navigators, input validators, view preparations, render
+    Every (phase, handler, page) has its own ring buffer in milliseconds
+    Hooks of GameController / GameView are None when stats are disabled
+    """
+    POINTS = (50, 95, 99)
+
+    def __init__(self, size: int = 1024) -> None:
+        self.size = size
+        self.series: Dict[Key, RingBuffer] = {}
+        # показывать строку статистики в кадре
+        self.overlay = False
+
+    def record(self, key: Key, ms: float) -> None:
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = RingBuffer(self.size)
+        series.add(ms)
+
+    def call(self, phase: str, page: str, callback: Callable, *args) -> Any:
+        """Вызвать обработчик и записать время его выполнения"""
+        start = time.perf_counter()
+        try:
+            return callback(*args)
+        finally:
+            self.record((phase, callback.__name__, page), (time.perf_counter() - start) * 1000)
+
+    def summary(self) -> Dict[Key, List[float]]:
+        """p50 / p95 / p99 каждой серии"""
+        return {key: series.percentiles(*FrameStats.POINTS) for key, series in self.series.items()}
+
+    def overlay_line(self) -> str:
+        """Строка статистики кадра для отображения под страницей"""
+        frame = self.series.get(FRAME)
+        if frame is None:
+            return "[stats] no frames yet"
+        p50, p95, p99 = frame.percentiles(*FrameStats.POINTS)
+        return f"[stats] frame p50 {p50:.2f} / p95 {p95:.2f} / p99 {p99:.2f} ms, n={len(frame)}"
+
+    def toggle(self) -> None:
+        self.overlay = not self.overlay
+
+    def log(self) -> None:
+        """Записать сводку в лог, самые медленные серии первыми"""
+        from loguru import logger
+        summary = sorted(self.summary().items(), key = lambda item: item[1][1], reverse = True)
+        for (phase, handler, page), (p50, p95, p99) in summary:
+            logger.info(
+                f"[stats] {phase:<10} {handler:<32} {page:<14} "
+                f"p50 {p50:8.3f} | p95 {p95:8.3f} | p99 {p99:8.3f} ms | n={len(self.series[(phase, handler, page)])}"
+            )
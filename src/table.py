@@ -0,0 +1,48 @@
+import weakref
+from typing import Any, List, Optional, Tuple
+
+from src.context import Page
+from src.cursor import PageCursor
+
+class Table:
+    """
+    Layout of the table for one result set (PageCursor): games or facets
+    Column widths are the same on every page, rows of the current page are formatted
+    once in both states (selected / not), moving the selector only joins them
+    """
+    def __init__(self, cursor: PageCursor, page: Page) -> None:
+        # таблица хранится в WeakKeyDictionary по курсору - сильная ссылка не дала бы освободить курсор
+        self.cursor = weakref.proxy(cursor)
+        self.page = page
+
+        # первая колонка - номер строки, остальные - значения записи
+        headers = page.headers
+        widths = (len(str(cursor.count)),) + cursor.widths
+        self.widths: Tuple[int, ...] = tuple(max(len(header), width) + 2 for header, width in zip(headers, widths))
+        self.header = "|".join(header.center(width) for header, width in zip(headers, self.widths))
+
+        # отформатированная текущая страница: номер, строки без выбора и с выбором
+        self.number: Optional[int] = None
+        self.plain: List[str] = []
+        self.selected: List[str] = []
+
+    def format(self, number: int, items: List[Any]) -> None:
+        """Отформатировать строки страницы number"""
+        first = self.page.rows * (number - 1)
+        self.plain, self.selected = [], []
+        for i, item in enumerate(items):
+            cols = "|".join(
+                str(value).center(width)
+                for value, width in zip((first + i + 1,) + self.cursor.values(item), self.widths)
+            )
+            self.plain.append(self.page.single_row.render(cols = cols, select = 0))
+            self.selected.append(self.page.single_row.render(cols = cols, select = 1))
+        self.number = number
+
+    def rows(self, number: int, button: int) -> str:
+        """Строки страницы number с выбранной кнопкой button"""
+        if number != self.number:
+            self.format(number, self.cursor.page(number))
+
+        i = button - 1
+        return "\n".join(self.plain[:i] + self.selected[i:i + 1] + self.plain[i + 1:])
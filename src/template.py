@@ -0,0 +1,52 @@
+from string import Formatter
+from typing import Mapping
+
+from src.utils import Frozen
+
+class Template(Frozen):
+    """
+    Page text compiled once: positions of all {placeholders} are resolved,
+    render is filling of the slots and a single join
+    {select} is special: n-th occurrence is the n-th button of the page
+    """
+    __slots__ = ('parts', 'fields', 'selects', 'names')
+
+    SELECT = 'select'
+    SELECTED = '[>]'
+    NOT_SELECTED = '   '
+
+    def __init__(self, text: str) -> None:
+        parts = []
+        fields = []
+        selects = []
+
+        for literal, name, _, _ in Formatter().parse(text):
+            if literal:
+                parts.append(literal)
+            if name is None:
+                continue
+            if name == Template.SELECT:
+                selects.append(len(parts))
+            else:
+                fields.append((len(parts), name))
+            parts.append('')
+
+        super().__init__(
+            parts = tuple(parts),
+            fields = tuple(fields),
+            selects = tuple(selects),
+            names = frozenset(name for _, name in fields)
+        )
+
+    def render(self, values: Mapping = None, select: int = 0, **kwargs) -> str:
+        """Собрать текст, select - номер выбранной кнопки (с 1), 0 - не выбрана"""
+        values = values if values is not None else {}
+        parts = list(self.parts)
+        for index, name in self.fields:
+            value = kwargs[name] if name in kwargs else values.get(name, '')
+            parts[index] = value if isinstance(value, str) else str(value)
+
+        for number, index in enumerate(self.selects, 1):
+            parts[index] = Template.SELECTED if number == select else Template.NOT_SELECTED
+
+        return ''.join(parts)
@@ -0,0 +1,168 @@
+import csv
+import sys
+import json
+import time
+import sqlite3
+import itertools
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+from src.inputs import InputManager
+from src.models import Game, fold
+from src.exceptions import InputValidationError
+
+CSV = 'csv'
+JSONL = 'jsonl'
+FIELDS = ('name', 'author', 'year')
+# предел параметров одного запроса: 32766 с SQLite 3.32, 999 в старых сборках
+MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+# строк в одном insert_many - 5 параметров на строку
+INSERT_ROWS = MAX_VARIABLES // 5
+
+@dataclass
+class TransferStats:
+    """Rows processed by import / export and throughput"""
+    rows: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory = list)
+    started: float = field(default_factory = time.perf_counter)
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Строк в секунду"""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+def detect_format(path: str) -> str:
+    """Формат файла по расширению"""
+    return JSONL if path.endswith(('.jsonl', '.ndjson', '.json')) else CSV
+
+@contextmanager
+def open_file(path: str, mode: str) -> Iterator[TextIO]:
+    """Открыть файл, '-' - stdin / stdout"""
+    if path == '-':
+        yield sys.stdin if 'r' in mode else sys.stdout
+        return
+    with open(path, mode, encoding = 'utf-8', newline = '') as f:
+        yield f
+
+def read_rows(f: TextIO, fmt: str) -> Iterator[Dict]:
+    """
+    Построчное чтение игр из csv (с заголовком) или jsonl
+    Испорченная строка jsonl не прерывает чтение - вместо неё InputValidationError,
+    validate_rows запишет её в ошибки импорта
+    """
+    if fmt == CSV:
+        yield from csv.DictReader(f)
+    else:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield InputValidationError(f"Invalid JSON: {e}")
+
+def validate_row(row: Dict) -> Dict:
+    """Проверить поля игры так же, как при вводе с клавиатуры"""
+    game = dict(
+        name = InputManager.validate(str(row.get('name') or '').strip(), 'str'),
+        author = InputManager.validate(str(row.get('author') or '').strip(), 'str'),
+        year = InputManager.validate(str(row.get('year') or ''), 'int'),
+    )
+    if not game['name'] or not game['author']:
+        raise InputValidationError("Game without name or publisher")
+    return game
+
+def validate_rows(rows: List[Dict]) -> Tuple[List[Tuple[str, str, int]], List[Tuple[int, str]]]:
+    """
+    validate_row для пачки строк по столбцам (InputManager.validate_many)
+    Возвращает кортежи (name, author, year) верных строк и (индекс строки, ошибка) остальных
+    """
+    errors: Dict[int, str] = {}
+    for index, row in enumerate(rows):
+        if isinstance(row, InputValidationError):
+            errors[index] = str(row)
+        elif not isinstance(row, dict):
+            errors[index] = f"Row is not an object: {row!r}"
+    rows = [row if isinstance(row, dict) else {} for row in rows]
+
+    names = InputManager.validate_many([str(row.get('name') or '').strip() for row in rows], 'str')
+    authors = InputManager.validate_many([str(row.get('author') or '').strip() for row in rows], 'str')
+    years = InputManager.validate_many([str(row.get('year') or '') for row in rows], 'int')
+    # первая ошибка строки - в том же порядке полей, что и в validate_row
+    for column in (names, authors, years):
+        for index, error in column.errors:
+            errors.setdefault(index, error)
+
+    games = []
+    for index, game in enumerate(zip(names.values, authors.values, years.values)):
+        if index in errors:
+            continue
+        if not game[0] or not game[1]:
+            errors[index] = "Game without name or publisher"
+            continue
+        games.append(game)
+    return games, sorted(errors.items())
+
+def import_games(rows: Iterable[Dict], batch_size: int = 5000, on_batch = None) -> TransferStats:
+    """
+    Загрузить игры пачками, каждая пачка (batch_size строк) в своей транзакции,
+    внутри транзакции insert_many по INSERT_ROWS строк
+    Пачка проверяется по столбцам (validate_rows), строки с ошибками пропускаются
+    и попадают в stats.errors (номер строки, ошибка)
+    """
+    stats = TransferStats()
+    database = Game._meta.database
+    rows = iter(rows)
+    number = 0
+    # SQL insert_many зависит только от количества строк - собирается один раз на размер пачки
+    compiled: Dict[int, str] = {}
+
+    def insert(games):
+        sql = compiled.get(len(games))
+        if sql is None:
+            sql, _ = Game.insert_many(games, fields = [Game.name, Game.author, Game.year, Game.name_fold, Game.author_fold]).sql()
+            compiled[len(games)] = sql
+        database.execute_sql(sql, list(itertools.chain.from_iterable(games)))
+
+    def flush(batch):
+        # столбцы поиска без учёта регистра - при вставке, проверка строк их не касается
+        batch = [(name, author, year, fold(name), fold(author)) for name, author, year in batch]
+        with database.atomic():
+            for start in range(0, len(batch), INSERT_ROWS):
+                insert(batch[start:start + INSERT_ROWS])
+        stats.rows += len(batch)
+
+    while chunk := list(itertools.islice(rows, batch_size)):
+        games, errors = validate_rows(chunk)
+        stats.errors.extend((number + index + 1, error) for index, error in errors)
+        number += len(chunk)
+        if games:
+            flush(games)
+        if on_batch:
+            on_batch(stats)
+    return stats
+
+def export_games(f: TextIO, fmt: str, on_batch = None, batch_size: int = 50000) -> TransferStats:
+    """Выгрузить все игры потоком, без загрузки каталога в память"""
+    stats = TransferStats()
+    query = Game.select(Game.id, Game.name, Game.author, Game.year).order_by(Game.id).tuples()
+
+    if fmt == CSV:
+        writer = csv.writer(f)
+        writer.writerow(('id',) + FIELDS)
+        write = writer.writerow
+    else:
+        def write(game):
+            f.write(json.dumps(dict(zip(('id',) + FIELDS, game)), ensure_ascii = False) + '\n')
+
+    for game in query.iterator():
+        write(game)
+        stats.rows += 1
+        if on_batch and stats.rows % batch_size == 0:
+            on_batch(stats)
+
+    return stats
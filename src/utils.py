@@ -1,7 +1,4 @@
-from typing import Callable, List
-from dataclasses import dataclass
-import yaml
-import os
+from typing import Any
 
 from src.exceptions import *
 
@@ -18,138 +15,52 @@ class Struct(dict):
 
     def __getattr__(cls, key):
         item = cls.get(key)
-        if isinstance(item, dict):
-            item = Struct(**item)
+        if isinstance(item, dict) and not isinstance(item, Struct):
+            # обернуть один раз и сохранить, а не создавать Struct при каждом обращении
+            item = cls[key] = Struct(**item)
         elif isinstance(item, list):
             for i in range(len(item)):
-                if isinstance(item[i], dict):
+                if isinstance(item[i], dict) and not isinstance(item[i], Struct):
                     item[i] = Struct(**item[i])
         return item
 
-@dataclass
-class Navigator:
-    callback: Callable
-    page: str
-    buttons: List[int]
+class Frozen:
+    """
+    Immutable object with __slots__
+    All slots are filled in __init__, not given ones are None
+    """
+    __slots__ = ()
 
-@dataclass
-class InputHandler:
-    callback: Callable
-    on_page: str
+    def __init__(self, **kwargs) -> None:
+        for slot in self.__slots__:
+            object.__setattr__(self, slot, kwargs.get(slot))
 
-@dataclass
-class ViewPreparation:
-    callback: Callable
-    key: str
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-class LocalMemory(Struct): 
-    pass
-
-def wait_key():
-    ''' Wait for a key press on the console and return it. '''
-    result = None
-    if os.name == 'nt':
-        import msvcrt
-        result = msvcrt.getwch()
-    else:
-        import termios
-        fd = sys.stdin.fileno()
-
-        oldterm = termios.tcgetattr(fd)
-        newattr = termios.tcgetattr(fd)
-        newattr[3] = newattr[3] & ~termios.ICANON & ~termios.ECHO
-        termios.tcsetattr(fd, termios.TCSANOW, newattr)
-
-        try:
-            result = sys.stdin.read(1)
-        except IOError:
-            pass
-        finally:
-            termios.tcsetattr(fd, termios.TCSAFLUSH, oldterm)
-
-    return result
-
-class Key:
-    UP = 'w'
-    DOWN = 's'
-    LEFT = 'a'
-    RIGHT = 'd'
-
-    RU_UP = 'ц'
-    RU_DOWN = 'ы'
-    RU_LEFT = 'ф'
-    RU_RIGHT = 'в'
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-    ENTER = '\r'
-    ESC = ''
-
-    ARROW_UP = b'\xc3\xa0H' 
-    ARROW_DOWN = b'\xc3\xa0P'
-    ARROW_LEFT = b'\xc3\xa0K'
-    ARROW_RIGHT = b'\xc3\xa0M'
-
-class ControlKey:
-    UP = 'up'
-    DOWN = 'down'
-    LEFT = 'left'
-    RIGHT = 'right'
-
-    ENTER = 'enter'
-    ESC = 'esc'
-    UNKNOW = False
-
-class KeyMap:
-    UP = (Key.UP, Key.RU_UP, Key.ARROW_UP)
-    DOWN = (Key.DOWN, Key.RU_DOWN, Key.ARROW_DOWN)
-    LEFT = (Key.LEFT, Key.RU_LEFT, Key.ARROW_LEFT)
-    RIGHT = (Key.RIGHT, Key.RU_RIGHT, Key.ARROW_RIGHT)
-
-    @staticmethod
-    def whatkey(key: str, arrow: bytes = b'') -> ControlKey:
-        if key.lower() in KeyMap.UP or\
-           arrow == KeyMap.UP[-1]:
-            return ControlKey.UP
-        
-        elif key.lower() in KeyMap.DOWN or\
-             arrow == KeyMap.DOWN[-1]:
-            return ControlKey.DOWN
-        
-        elif key.lower() in KeyMap.LEFT or\
-             arrow == KeyMap.LEFT[-1]:
-            return ControlKey.LEFT
-        
-        elif key.lower() in KeyMap.RIGHT or\
-             arrow == KeyMap.RIGHT[-1]:
-            return ControlKey.RIGHT
-        
-        elif key == Key.ENTER:
-            return ControlKey.ENTER
-        
-        elif key == Key.ESC:
-            return ControlKey.ESC
-        
-        else:
-            return ControlKey.UNKNOW
+    @classmethod
+    def restore(cls, values: tuple) -> 'Frozen':
+        """Объект из значений слотов без повторной компиляции в __init__ (кэш локализаций)"""
+        obj = object.__new__(cls)
+        for slot, value in zip(cls.__slots__, values):
+            object.__setattr__(obj, slot, value)
+        return obj
 
+class LocalMemory(Struct): 
+    pass
 
-def set_console_size(width: int, height: int):
-    os.system(f'cmd /c mode con: cols={width} lines={height}')
+def unquote(text: str) -> str:
+    """Убрать кавычки вокруг текста из локализации: "text" -> text"""
+    stripped = text.strip()
+    if len(stripped) > 1 and stripped.startswith('"') and stripped.endswith('"'):
+        return stripped[1:-1]
+    return text
 
 def load_yaml(path):
+    # yaml нужен только при разборе локализации без кэша
+    import yaml
     with open(path, 'r', encoding = 'utf-8') as f:
         return Struct(**yaml.safe_load(f))
-
-def nth_repl(s, sub, repl, n):
-    """https://stackoverflow.com/questions/35091557/replace-nth-occurrence-of-substring-in-string"""
-    find = s.find(sub)
-    # If find is not -1 we have found at least one match for the substring
-    i = find != -1
-    # loop util we find the nth or we find no match
-    while find != -1 and i != n:
-        # find + 1 means we start searching from after the last match
-        find = s.find(sub, find + 1)
-        i += 1
-    # If i is equal to n we found nth match so replace
-    if i == n:
-        return s[:find] + repl + s[find+len(sub):]
-    return s
\ No newline at end of file
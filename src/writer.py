@@ -0,0 +1,140 @@
+import atexit
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+# запись: функция и её аргументы, выполняется в потоке записи
+Write = Tuple[Callable, tuple, dict]
+
+class WriteBehind:
+    """
+    Write-behind queue: add / edit / delete return at once, a background thread
+    runs the queued writes in one transaction per group (group commit) -
+    when batch_size writes are waiting or interval seconds after the first one
+    sync() waits until everything queued before it is in the database: reads call it
+    to see their own writes. Pending writes are flushed by close() and at exit
+    """
+    def __init__(self, batch_size: int = 100, interval: float = 0.05,
+                 on_flush: Optional[Callable[[], None]] = None, database = None) -> None:
+        self.batch_size = batch_size
+        self.interval = interval
+        # после каждой группы: сбросить кэш результатов
+        self.on_flush = on_flush
+        # по умолчанию база моделей, определяется в потоке записи при первой группе
+        self.database = database
+
+        self.pending: List[Write] = []
+        self.condition = threading.Condition()
+        # номер последней поставленной в очередь записи и последней сохранённой
+        self.queued = 0
+        self.written = 0
+        self.urgent = False
+        self.closed = False
+        self.thread: Optional[threading.Thread] = None
+
+        # счётчики для статистики / тестов
+        self.groups = 0
+        self.failed = 0
+
+    def submit(self, func: Callable, *args, **kwargs) -> None:
+        """Поставить запись в очередь, func(*args, **kwargs) выполнится в потоке записи"""
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("write-behind queue is closed")
+            if self.thread is None:
+                self.thread = threading.Thread(target = self.run, name = 'write-behind', daemon = True)
+                self.thread.start()
+                atexit.register(self.close)
+            self.pending.append((func, args, kwargs))
+            self.queued += 1
+            # первая запись группы - поток записи начинает отсчёт interval, полная группа - пишется сразу
+            if len(self.pending) == 1 or len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+
+    def sync(self) -> None:
+        """Дождаться записи всего, что поставлено в очередь до вызова"""
+        with self.condition:
+            target = self.queued
+            if self.written >= target:
+                return
+            # читатель ждёт - группа пишется сразу, без interval
+            self.urgent = True
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.written >= target)
+
+    def close(self) -> None:
+        """Записать всё из очереди и остановить поток"""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self) -> None:
+        try:
+            self.loop()
+        finally:
+            # соединение потока записи живёт, пока жива очередь; пул получает его обратно только здесь
+            database = self.get_database()
+            if not database.is_closed():
+                database.close()
+
+    def loop(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed)
+                if not self.pending:
+                    return
+                # копим группу: до batch_size записей или interval секунд
+                self.condition.wait_for(
+                    lambda: len(self.pending) >= self.batch_size or self.urgent or self.closed,
+                    timeout = self.interval,
+                )
+                group, self.pending = self.pending, []
+                self.urgent = False
+
+            try:
+                self.flush(group)
+            except Exception as e:
+                # база недоступна: группа потеряна, но поток записи и ожидающие sync() продолжают работу
+                from loguru import logger
+                logger.exception(e)
+                self.failed += len(group)
+            with self.condition:
+                self.written += len(group)
+                self.condition.notify_all()
+
+    def flush(self, group: List[Write]) -> None:
+        """Группа записей в одной транзакции, при ошибке - каждая запись отдельно"""
+        database = self.get_database()
+        # своё соединение на всё время работы потока: между группами его не заберёт поток интерфейса
+        if database.is_closed():
+            database.connect()
+        try:
+            with database.atomic():
+                for func, args, kwargs in group:
+                    func(*args, **kwargs)
+        except Exception:
+            for write in group:
+                self.write_one(database, write)
+        self.groups += 1
+        if self.on_flush:
+            self.on_flush()
+
+    def write_one(self, database, write: Write) -> None:
+        func, args, kwargs = write
+        try:
+            with database.atomic():
+                func(*args, **kwargs)
+        except Exception as e:
+            # ошибку записи некому вернуть - пользователь уже на следующей странице
+            from loguru import logger
+            logger.exception(e)
+            self.failed += 1
+
+    def get_database(self) -> Any:
+        if self.database is None:
+            from src.models import Game
+            self.database = Game._meta.database
+        return self.database
@@ -101,12 +101,683 @@ def test_inputs():
 
         return tests
 
+    def test_intrange():
+        from src.inputs import IntRange
+        tests = Tests()
+
+        tests._assert(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = '1990'), IntRange(1990, 1990))
+        tests._assert(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = '1990-2000'), IntRange(1990, 2000))
+        tests._assert(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = '1990 .. 2000'), IntRange(1990, 2000))
+        tests._assert(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = '2000-1990'), IntRange(1990, 2000))
+        tests._assert(str(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = '1990-2000')), '1990-2000')
+
+        tests._assert(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = '1990-'), 'Error while validating input "1990-" as range')
+        tests._assert(InputManager.get_input(IntRange, on_error = Tests.return_error, debug_value = 'abc'), 'Error while validating input "abc" as range')
+
+        return tests
+
+    def test_batch():
+        from src.inputs import IntRange
+        from src.transfer import validate_rows
+        tests = Tests()
+
+        result = InputManager.validate_many(['1', '-9_9_9_9 ', '1.2', '99 99'], 'int')
+        tests._assert(result.values, [1, -9999, None, 9999])
+        tests._assert(result.errors, [(2, 'Error while validating input "1.2" as int')])
+        tests._assert(InputManager.validate_many(['-0,05', '1.1.'], 'float').values, [-0.05, None])
+        tests._assert(InputManager.validate_many(['YES', 'n', 'maybe'], 'bool').values, [True, False, None])
+        tests._assert(InputManager.validate_many(['2000-1990', '1990-'], 'intrange').values, [IntRange(1990, 2000), None])
+        tests._assert(InputManager.validate_many(['https://google.com', 'google'], 'str', regex_pattern = r'https?://.+\..+').errors,
+                      [(1, 'Error while validating input "google" as str with regex pattern "https?://.+\..+"')])
+
+        # столбцы пачки импорта - первая ошибка строки, как у validate_row
+        games, errors = validate_rows([
+            dict(name = 'Portal', author = 'Valve', year = '2007'),
+            dict(name = ' ', author = 'Valve', year = '2007'),
+            dict(name = 'Doom', author = 'id', year = 'x'),
+            ['Doom'],
+        ])
+        tests._assert(games, [('Portal', 'Valve', 2007)])
+        tests._assert([index for index, _ in errors], [1, 2, 3])
+        tests._assert(errors[1][1], 'Error while validating input "x" as int')
+
+        return tests
+
 
     Tests.run_test(test_int)
     Tests.run_test(test_float)
     Tests.run_test(test_str)
     Tests.run_test(test_bool)
     Tests.run_test(test_list)
+    Tests.run_test(test_intrange)
+    Tests.run_test(test_batch)
+
+def test_locale():
+    import os
+    import json
+    import tempfile
+    from src.context import LocaleCache, Localization, encode
+
+    def test_cache():
+        tests = Tests()
+
+        with tempfile.TemporaryDirectory() as folder:
+            cache = LocaleCache(folder)
+            source = f'{Localization.path}/en-EN.yml'
+            compiled = cache.load(source, Localization.compile)
+            cached = cache.read(source)['data']
+            # тот же пакет: все страницы, шаблоны и вопросы
+            tests._assert(encode(cached) == encode(compiled), True)
+            tests._assert(cached['main'].template.parts, compiled['main'].template.parts)
+
+            # в кэше только примитивы с метками типов - чужие метки и другая версия кода не читаются
+            path = cache.cache_path(source)
+            with open(path, encoding = 'utf-8') as f:
+                entry = json.load(f)
+            for broken in ({**entry, 'version': 'old'}, {**entry, 'data': {'$': 'os.system', 'v': ['echo']}}):
+                with open(path, 'w', encoding = 'utf-8') as f:
+                    json.dump(broken, f)
+                tests._assert(cache.read(source), None)
+            # повреждённый кэш - пакет компилируется заново
+            tests._assert(encode(cache.load(source, Localization.compile)) == encode(compiled), True)
+            tests._assert(os.path.exists(path + '.tmp'), False)
+
+        return tests
+
+    def test_registry():
+        from src.context import LanguageRegistry
+        tests = Tests()
+
+        with tempfile.TemporaryDirectory() as folder:
+            def write(name: str, lang_name: str, mtime: int) -> None:
+                path = os.path.join(folder, name)
+                with open(path, 'w', encoding = 'utf-8') as f:
+                    f.write(f'lang_name: {lang_name}\nmain:\n  name: main\n')
+                os.utime(path, ns = (mtime, mtime))
+
+            write('en-EN.yml', 'English', 10 ** 18)
+            write('all-ALL.yml', 'All', 10 ** 18)
+            registry = LanguageRegistry(folder)
+            tests._assert([(lang.language, lang.lang_name) for lang in registry.languages], [('EN', 'English')])
+
+            # изменение файла без изменения папки тоже видно
+            os.utime(folder, ns = (10 ** 18, 10 ** 18))
+            write('en-EN.yml', 'Engl1sh', 2 * 10 ** 18)
+            os.utime(folder, ns = (10 ** 18, 10 ** 18))
+            tests._assert([lang.lang_name for lang in registry.languages], ['Engl1sh'])
+
+        return tests
+
+    Tests.run_test(test_cache)
+    Tests.run_test(test_registry)
+
+def test_keys():
+    from src.keyboard import KeyDecoder, ControlKey
+    def keys(text: str) -> list:
+        return [event.key for event in KeyDecoder().feed(text)]
+
+    def test_decoder():
+        tests = Tests()
+
+        tests._assert(keys('wasd'), [ControlKey.UP, ControlKey.LEFT, ControlKey.DOWN, ControlKey.RIGHT])
+        tests._assert(keys('ЦФЫВ'), [ControlKey.UP, ControlKey.LEFT, ControlKey.DOWN, ControlKey.RIGHT])
+        tests._assert(keys('\x1b[A\x1b[B\x1bOD\x1b[C'), [ControlKey.UP, ControlKey.DOWN, ControlKey.LEFT, ControlKey.RIGHT])
+        tests._assert(keys('àHàP\x00K\x00M'), [ControlKey.UP, ControlKey.DOWN, ControlKey.LEFT, ControlKey.RIGHT])
+        tests._assert(keys('\r\n'), [ControlKey.ENTER, ControlKey.ENTER])
+        tests._assert(keys('\x1b'), [ControlKey.ESC])
+        tests._assert(keys('`ё'), [ControlKey.STATS, ControlKey.STATS])
+        tests._assert(keys('\x7f\x08'), [ControlKey.BACKSPACE, ControlKey.BACKSPACE])
+        # на live странице буквы - ввод текста, escape последовательности - нет
+        tests._assert([event.printable for event in KeyDecoder().feed('wЖ \x1b[A\r')], [True, True, True, False, False])
+        tests._assert(keys('\x1bw'), [ControlKey.ESC, ControlKey.UP])
+        tests._assert(keys('x\x1b[Z'), [ControlKey.UNKNOW, ControlKey.UNKNOW, ControlKey.UNKNOW])
+
+        # последовательность разбита между чтениями
+        decoder = KeyDecoder()
+        tests._assert(decoder.feed('\x1b[', final = False) + decoder.feed('A'), [(ControlKey.UP, '\x1b[A')])
+
+        return tests
+
+    Tests.run_test(test_decoder)
+
+def test_stats():
+    from src.stats import RingBuffer, FrameStats
+    def test_ring():
+        tests = Tests()
+
+        ring = RingBuffer(4)
+        tests._assert(ring.percentiles(50), [0.0])
+        for value in (1, 2, 3, 4, 5, 6):
+            ring.add(value)
+        # старые значения перезаписаны
+        tests._assert(sorted(ring), [3, 4, 5, 6])
+        tests._assert(len(ring), 4)
+        tests._assert(ring.percentiles(50, 99), [4, 6])
+
+        stats = FrameStats(size = 8)
+        def handler(x):
+            return x * 2
+        tests._assert(stats.call('navigator', 'main', handler, 21), 42)
+        tests._assert(list(stats.series), [('navigator', 'handler', 'main')])
+
+        return tests
+
+    Tests.run_test(test_ring)
+
+def test_database():
+    import os
+    import json
+    import tempfile
+    import threading
+    from src.database import open_database
+    from src.models import Game, MODELS, create_schema
+
+    def test_pool():
+        tests = Tests()
+
+        with tempfile.TemporaryDirectory() as folder:
+            # база как при запуске: файл и пул соединений
+            database = open_database(os.path.join(folder, 'pool.db'), pool = 2)
+            tests._assert(type(database).__name__, 'PooledSqliteDatabase')
+            with database.bind_ctx(MODELS):
+                with database.connection_context():
+                    create_schema(database)
+
+                # соединение, возвращённое в пул одним потоком, берёт следующий
+                counts = []
+                def work(number: int) -> None:
+                    with database.connection_context():
+                        Game.create(name = f'Game {number}', author = 'Valve', year = 2000)
+                        counts.append(Game.select().count())
+                for number in range(3):
+                    thread = threading.Thread(target = work, args = (number,))
+                    thread.start()
+                    thread.join()
+                tests._assert(counts, [1, 2, 3])
+                database.close_all()
+
+        return tests
+
+    def test_import():
+        import io
+        from peewee import SqliteDatabase
+        from src.transfer import read_rows, import_games, INSERT_ROWS, JSONL
+        tests = Tests()
+
+        database = SqliteDatabase(':memory:')
+        with database.bind_ctx(MODELS):
+            create_schema(database)
+            # пачка больше предела параметров одного запроса и испорченная строка jsonl
+            lines = [json.dumps(dict(name = f'Game {i}', author = 'Valve', year = 2000)) for i in range(INSERT_ROWS + 10)]
+            lines.insert(3, '{"name": "Doom",')
+            stats = import_games(read_rows(io.StringIO('\n'.join(lines)), JSONL), batch_size = len(lines))
+            tests._assert((stats.rows, Game.select().count()), (INSERT_ROWS + 10, INSERT_ROWS + 10))
+            tests._assert([number for number, _ in stats.errors], [4])
+            tests._assert(stats.errors[0][1].startswith('Invalid JSON'), True)
+            # столбцы поиска заполняются при вставке
+            tests._assert(Game.select(Game.name_fold, Game.author_fold).where(Game.id == 1).tuples().get(), ('game 0', 'valve'))
+        database.close()
+
+        return tests
+
+    def test_results():
+        import main
+        from peewee import SqliteDatabase
+        from src.cache import QueryCache
+        tests = Tests()
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'cache.db')
+            database = SqliteDatabase(path)
+            other = SqliteDatabase(path)
+            with database.bind_ctx(MODELS):
+                create_schema(database)
+                count = lambda: Game.select().count()
+
+                # запись этого процесса (main.write) увеличивает версию и сбрасывает результаты
+                results = main.results
+                results.invalidate()
+                tests._assert(results.get('count', count), 0)
+                version = results.version
+                main.write(Game.create, name = 'Portal', author = 'Valve', year = 2007)
+                tests._assert((results.version, results.get('count', count)), (version + 1, 1))
+
+                # результат запроса, во время которого была запись, не сохраняется
+                def racing():
+                    value = count()
+                    results.invalidate()
+                    return value
+                results.get('racing', racing)
+                tests._assert('racing' in results.entries, False)
+
+                # запись другого соединения меняет PRAGMA data_version - промах
+                cache = QueryCache(check_interval = 0)
+                tests._assert(cache.get('count', count), 1)
+                with other.bind_ctx(MODELS):
+                    Game.create(name = 'Doom', author = 'id', year = 1993)
+                tests._assert((cache.get('count', count), cache.version), (2, 1))
+                # без записей - попадание
+                tests._assert((cache.get('count', lambda: -1), cache.version), (2, 1))
+
+                # проверка data_version не чаще check_interval
+                slow = QueryCache(check_interval = 60)
+                slow.get('count', count)
+                with other.bind_ctx(MODELS):
+                    Game.create(name = 'Quake', author = 'id', year = 1996)
+                tests._assert(slow.get('count', count), 2)
+            other.close()
+            database.close()
+
+        return tests
+
+    Tests.run_test(test_pool)
+    Tests.run_test(test_import)
+    Tests.run_test(test_results)
+
+def test_search():
+    from src.search import TextFilter, GameSearch, trigrams, similarity
+    def test_filters():
+        tests = Tests()
+
+        tests._assert(TextFilter('Dark Souls').key, ('exact', 'dark souls'))
+        tests._assert(TextFilter('Dark*').key, ('prefix', 'dark'))
+        tests._assert(TextFilter('*Souls*').key, ('contains', 'Souls'))
+        tests._assert(TextFilter('~Drak Suols').key, ('fuzzy', 'Drak Suols'))
+        tests._assert(TextFilter('~ab').key, ('exact', '~ab'))
+        tests._assert(TextFilter('Valve*', TextFilter.EXACT).key, ('exact', 'valve*'))
+
+        tests._assert(GameSearch(name = '~Drak').plan, GameSearch.FUZZY)
+        tests._assert(GameSearch(name = 'Dark*', year = 2000).plan, GameSearch.INDEX)
+        tests._assert(GameSearch(author = '*alv*').plan, GameSearch.FTS)
+
+        return tests
+
+    def test_trigrams():
+        tests = Tests()
+
+        tests._assert(trigrams('Abcd'), {'abc', 'bcd'})
+        tests._assert(trigrams('ab'), set())
+        tests._assert(similarity(trigrams('сталкре'), trigrams('Сталкер')), (3 / 5, 3 / 7))
+        tests._assert(similarity(set(), trigrams('abc')), (0.0, 0.0))
+
+        return tests
+
+    def test_candidates():
+        from peewee import SqliteDatabase
+        from src.models import Game, MODELS, create_schema
+        from src.cursor import CandidateCursor
+        tests = Tests()
+
+        database = SqliteDatabase(':memory:')
+        with database.bind_ctx(MODELS):
+            create_schema(database)
+            Game.insert_many([Game.folded(dict(name = name, author = 'Valve', year = 2000)) for name in ('Half-Life', 'Half-Life 2', 'Halo', 'Portal')]).execute()
+
+            ha = CandidateCursor.search('Ha', rows = 2)
+            tests._assert([game.name for game in ha.page(1)], ['Half-Life', 'Half-Life 2'])
+            tests._assert((ha.count, ha.max_page, ha.complete), (3, 2, True))
+
+            # следующие символы уточняют набор в памяти - база больше не читается
+            Game.delete().execute()
+            half = CandidateCursor.search('Half-Life ', rows = 2, previous = ha)
+            tests._assert([game.name for game in half.page(1)], ['Half-Life 2'])
+            tests._assert(half.parent is ha, True)
+            # стёртый символ возвращает прошлый набор
+            tests._assert(CandidateCursor.search('Ha', rows = 2, previous = half) is ha, True)
+            tests._assert(CandidateCursor.search('Po', rows = 2, previous = half).count, 0)
+
+            # обрезанный limit набор не уточняется, запрос выполняется заново
+            Game.insert_many([Game.folded(dict(name = f'Doom {i}', author = 'id', year = 1993)) for i in range(5)]).execute()
+            doom = CandidateCursor.search('Doom', rows = 2, limit = 3)
+            tests._assert((doom.count, doom.complete), (3, False))
+            tests._assert(CandidateCursor.search('Doom 4', rows = 2, previous = doom, limit = 3).parent is doom, True)
+            tests._assert(CandidateCursor.search('Doom 4', rows = 2, previous = doom, limit = 3).complete, True)
+
+            # пустой запрос - полный пустой набор, следующий символ ищется по индексу
+            empty = CandidateCursor.search('', rows = 2)
+            tests._assert((empty.count, empty.complete), (0, True))
+            tests._assert(CandidateCursor.search('D', rows = 2, previous = empty).count, 5)
+
+        return tests
+
+    def test_fold():
+        from peewee import SqliteDatabase
+        from src.models import Game, MODELS, create_schema, fold
+        tests = Tests()
+
+        tests._assert(fold('ЁЛКИ Café'), 'ёлки cafe')
+        tests._assert(fold('ЙОД Ї'), 'йод ї')
+        tests._assert(fold('Мой') != fold('Мои'), True)
+        tests._assert(fold('Straße ＡＢＣ'), 'strasse abc')
+
+        database = SqliteDatabase(':memory:')
+        with database.bind_ctx(MODELS):
+            create_schema(database)
+            Game.create(name = 'Сталкер: Тень Чернобыля', author = 'GSC Game World', year = 2007)
+            # запись мимо save() - формы заполняются при следующем create_schema
+            Game.insert(name = 'Ёлки', author = 'Бука', year = 2010).execute()
+            create_schema(database)
+
+            def names(**filters):
+                return [game.name for game in GameSearch(**filters).query()]
+            tests._assert(names(name = 'СТАЛКЕР*'), ['Сталкер: Тень Чернобыля'])
+            tests._assert(names(name = 'ёлки', author = 'бука'), ['Ёлки'])
+            tests._assert(names(name = 'елки'), [])
+
+            # формы по старым правилам fold() пересчитываются
+            Game.update(name_fold = 'елки').where(Game.name == 'Ёлки').execute()
+            database.execute_sql('PRAGMA user_version = 1')
+            create_schema(database)
+            tests._assert(names(name = 'ёлки'), ['Ёлки'])
+            tests._assert(names(author = 'gsc game world'), ['Сталкер: Тень Чернобыля'])
+
+        return tests
+
+    Tests.run_test(test_filters)
+    Tests.run_test(test_trigrams)
+    Tests.run_test(test_fold)
+    def test_live_enter():
+        from benchmarks import temp_database
+        from benchmarks.mvc import Headless
+        from src.models import Game
+        from src.keyboard import KeyEvent, ControlKey
+        tests = Tests()
+
+        with temp_database():
+            Game.insert_many([Game.folded(dict(name = name, author = 'Valve', year = 2000)) for name in ('Half-Life', 'Portal')]).execute()
+            app = Headless()
+            app.open('main', 6)
+            # текст и ENTER в одной пачке нажатий - открывается найденная по набранному тексту игра
+            events = [KeyEvent(ControlKey.UNKNOW, char) for char in 'Por'] + [KeyEvent(ControlKey.ENTER, '\r')]
+            app.loop.run_until_complete(app.controller.press_keys(events))
+            tests._assert(app.cxt.action.name, 'game_page')
+            tests._assert(app.cxt.context.memory.current_game.name, 'Portal')
+            app.close()
+
+        return tests
+
+    def test_pages():
+        from peewee import SqliteDatabase
+        from src.models import Game, MODELS, create_schema
+        from src.cursor import PageCursor
+        tests = Tests()
+
+        class Spy(PageCursor):
+            # запросы страниц к базе
+            def fetch(self, query):
+                sqls.append(query.sql()[0])
+                return super().fetch(query)
+
+        database = SqliteDatabase(':memory:')
+        with database.bind_ctx(MODELS):
+            create_schema(database)
+            Game.insert_many([Game.folded(dict(name = f'Game {i}', author = 'Valve', year = 2000)) for i in range(1, 11)]).execute()
+
+            sqls = []
+            cursor = Spy(Game.select(), rows = 3)
+            # первая страница от "страницы" 0 - без условия по id и без offset
+            tests._assert(cursor.bounds, {0: None})
+            tests._assert([game.id for game in cursor.page(1)], [1, 2, 3])
+            tests._assert(('WHERE' in sqls[-1], 'OFFSET' in sqls[-1]), (False, False))
+            tests._assert(cursor.bounds, {0: None, 1: 3})
+
+            # следующая страница от границы предыдущей: удалённая строка не сдвигает страницу
+            Game.delete_by_id(2)
+            tests._assert([game.id for game in cursor.page(2)], [4, 5, 6])
+            tests._assert(('WHERE' in sqls[-1], 'OFFSET' in sqls[-1]), (True, False))
+            # назад на первую: снова от первой записи
+            tests._assert([game.id for game in cursor.page(1)], [1, 3, 4])
+            tests._assert(cursor.bounds, {0: None, 1: 4, 2: 6})
+
+            # прыжок через страницы - offset от последней известной границы
+            tests._assert([game.id for game in cursor.page(4)], [10])
+            tests._assert(('WHERE' in sqls[-1], 'OFFSET' in sqls[-1]), (True, True))
+            tests._assert(cursor.bounds[4], 10)
+            # страница за концом пустая и не добавляет границу
+            tests._assert((cursor.page(5), 5 in cursor.bounds), ([], False))
+            tests._assert((cursor.count, cursor.max_page), (9, 3))
+
+            # повторный запрос текущей страницы не идёт в базу
+            queries = len(sqls)
+            cursor.page(5)
+            tests._assert(len(sqls), queries)
+
+            # прыжок от первой страницы: граница 0 - None, offset без условия по id
+            jump = Spy(Game.select().where(Game.id > 3), rows = 2)
+            tests._assert([game.id for game in jump.page(3)], [8, 9])
+            tests._assert(('OFFSET' in sqls[-1], jump.bounds), (True, {0: None, 3: 9}))
+
+        return tests
+
+    Tests.run_test(test_pages)
+    Tests.run_test(test_candidates)
+    Tests.run_test(test_live_enter)
+
+def test_facets():
+    from peewee import SqliteDatabase
+    from src.models import Game, AuthorFacet, MODELS, create_schema
+    from src.cursor import FacetCursor
+
+    def test_drilldown():
+        tests = Tests()
+
+        database = SqliteDatabase(':memory:')
+        with database.bind_ctx(MODELS):
+            create_schema(database)
+            for author in ('Valve', 'Valve', 'VALVE'):
+                Game.create(name = 'Half-Life', author = author, year = 1998)
+
+            # выбор издателя открывает столько игр, сколько показывает счётчик
+            facets = FacetCursor(AuthorFacet, rows = 10)
+            tests._assert(sorted(facets.values(facet) for facet in facets.page(1)), [('VALVE', 1), ('Valve', 2)])
+            for facet in facets.page(1):
+                tests._assert(facets.search(facet).query().count(), facet.games)
+
+        return tests
+
+    def test_triggers():
+        from src.models import YearFacet
+        tests = Tests()
+
+        def counts(model):
+            return sorted(model.select().tuples())
+
+        database = SqliteDatabase(':memory:')
+        with database.bind_ctx(MODELS):
+            create_schema(database)
+            portal = Game.create(name = 'Portal', author = 'Valve', year = 2007)
+            Game.create(name = 'Half-Life', author = 'Valve', year = 1998)
+            Game.create(name = 'Сталкер', author = 'GSC', year = 2007)
+            tests._assert(counts(AuthorFacet), [('GSC', 1), ('Valve', 2)])
+            tests._assert(counts(YearFacet), [(1998, 1), (2007, 2)])
+
+            # смена издателя: -1 старому, +1 новому; год не менялся - счётчики лет те же
+            Game.update(author = 'VALVE').where(Game.id == portal.id).execute()
+            tests._assert(counts(AuthorFacet), [('GSC', 1), ('VALVE', 1), ('Valve', 1)])
+            tests._assert(counts(YearFacet), [(1998, 1), (2007, 2)])
+
+            # пустые счётчики удаляются
+            Game.delete_by_id(portal.id)
+            tests._assert(counts(AuthorFacet), [('GSC', 1), ('Valve', 1)])
+            tests._assert(counts(YearFacet), [(1998, 1), (2007, 1)])
+
+            # база без таблиц счётчиков - они считаются по существующим играм
+            database.drop_tables([AuthorFacet, YearFacet])
+            create_schema(database)
+            tests._assert(counts(AuthorFacet), [('GSC', 1), ('Valve', 1)])
+            tests._assert(counts(YearFacet), [(1998, 1), (2007, 1)])
+
+        return tests
+
+    Tests.run_test(test_drilldown)
+    Tests.run_test(test_triggers)
+
+def test_server():
+    from src.server import TelnetParser, IAC, DO, SB, SE, ECHO
+    def test_telnet():
+        tests = Tests()
+
+        parser = TelnetParser()
+        tests._assert(parser.feed(bytes((IAC, DO, ECHO)) + b'ab' + bytes((IAC, IAC))), b'ab\xff')
+        # подсогласование (размер окна) пропускается целиком, даже разбитое между чтениями
+        tests._assert(parser.feed(bytes((IAC, SB, 31, 0, 80)) + b'x'), b'')
+        tests._assert(parser.feed(bytes((0, 24, IAC, SE)) + b's'), b's')
+        # enter приходит как \r\n или \r\0 - это одно нажатие
+        tests._assert(parser.feed(b'\r\0w\r'), b'\rw\r')
+        tests._assert(parser.feed(b'\nd'), b'd')
+
+        return tests
+
+    def test_sessions():
+        import time
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        import main
+        from src.mvc import GameController
+        tests = Tests()
+
+        # две сессии в общем пуле, как у GameServer
+        executor = ThreadPoolExecutor(max_workers = 4)
+        first, second = (GameController(main.cxt, main.game_model, executor = executor) for _ in range(2))
+        running = {first: 0, second: 0}
+        peaks = {first: 0, second: 0, None: 0}
+
+        def handler(controller):
+            running[controller] += 1
+            peaks[controller] = max(peaks[controller], running[controller])
+            peaks[None] = max(peaks[None], sum(running.values()))
+            time.sleep(0.05)
+            running[controller] -= 1
+
+        async def work():
+            await asyncio.gather(*(controller.run(handler, controller) for controller in (first, first, first, second, second)))
+        asyncio.run(work())
+        executor.shutdown()
+        # обработчики сессии по одному, сессии между собой - параллельно
+        tests._assert((peaks[first], peaks[second], peaks[None]), (1, 1, 2))
+
+        return tests
+
+    Tests.run_test(test_telnet)
+    Tests.run_test(test_sessions)
+
+def test_api():
+    import os
+    import json
+    import tempfile
+    import threading
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+    from src.database import open_database
+    from src.models import MODELS, create_schema
+    from src.api import make_server
+
+    def test_http():
+        tests = Tests()
+
+        def call(method, path, body = None, headers = {}):
+            data = json.dumps(body).encode() if body is not None else None
+            try:
+                with urlopen(Request(url + path, data = data, method = method, headers = headers)) as response:
+                    text = response.read()
+                    return response.status, dict(response.headers), json.loads(text) if text else None
+            except HTTPError as e:
+                text = e.read()
+                return e.code, dict(e.headers), json.loads(text) if text else None
+
+        with tempfile.TemporaryDirectory() as folder:
+            # база как в api.py: файл и пул соединений, запросы идут из разных потоков сервера
+            database = open_database(os.path.join(folder, 'api.db'))
+            with database.bind_ctx(MODELS):
+                with database.connection_context():
+                    create_schema(database)
+                server = make_server('127.0.0.1', 0)
+                url = f'http://127.0.0.1:{server.server_address[1]}'
+                threading.Thread(target = server.serve_forever, daemon = True).start()
+
+                for name in ('Half-Life', 'Half-Life 2', 'Portal'):
+                    status, headers, game = call('POST', '/games', dict(name = name, author = 'Valve', year = 2004))
+                tests._assert((status, headers['Location'], game['name']), (201, f"/games/{game['id']}", 'Portal'))
+                tests._assert(call('POST', '/games', dict(name = 'Doom', author = 'id', year = 'x'))[0], 400)
+
+                # курсорная пагинация
+                status, headers, page = call('GET', '/games?name=Half*&limit=1')
+                tests._assert([game['name'] for game in page['games']], ['Half-Life'])
+                page = call('GET', f"/games?name=Half*&limit=1&cursor={page['next']}")[2]
+                tests._assert((page['games'][0]['name'], page['next']), ('Half-Life 2', None))
+
+                # ETag - версия данных, после изменения ответ снова 200
+                etag = headers['ETag']
+                tests._assert(call('GET', '/games?name=Half*&limit=1', headers = {'If-None-Match': etag})[0], 304)
+                tests._assert(call('PATCH', f"/games/{game['id']}", dict(year = 2007))[2]['year'], 2007)
+                status, headers, _ = call('GET', f"/games/{game['id']}", headers = {'If-None-Match': etag})
+                tests._assert((status, headers['ETag'] != etag), (200, True))
+
+                tests._assert(call('POST', '/games', headers = {'Content-Length': '-1'})[0], 400)
+                tests._assert(call('DELETE', f"/games/{game['id']}")[0], 204)
+                tests._assert(call('GET', f"/games/{game['id']}")[0], 404)
+                server.shutdown()
+                server.server_close()
+                database.close_all()
+
+        return tests
+
+    Tests.run_test(test_http)
+
+def test_writer():
+    import os
+    import tempfile
+    from src.database import open_database
+    from src.models import Game, MODELS, create_schema
+    from src.writer import WriteBehind
+    from loguru import logger
+
+    def test_group_commit():
+        tests = Tests()
+
+        with tempfile.TemporaryDirectory() as folder:
+            # как в main.py: база с пулом, поток записи держит своё соединение, читатель берёт другое
+            database = open_database(os.path.join(folder, 'writer.db'))
+            with database.bind_ctx(MODELS), database.connection_context():
+                create_schema(database)
+                flushed = []
+                writes = WriteBehind(batch_size = 10, interval = 1.0, on_flush = lambda: flushed.append(1))
+
+                for i in range(25):
+                    writes.submit(Game.create, name = f'Game {i}', author = 'Valve', year = 2000)
+                writes.submit(Game.delete_by_id, 1)
+                # чтение после sync видит все свои записи, не дожидаясь interval
+                writes.sync()
+                tests._assert(Game.select().count(), 24)
+                # соединение потока записи занято им до close, в пул оно не вернулось
+                tests._assert(len(database._in_use), 2)
+                # 26 записей - не больше трёх транзакций (группы по 10 и остаток при sync)
+                tests._assert(writes.groups <= 3, True)
+                tests._assert((len(flushed), writes.written, writes.queued), (writes.groups, 26, 26))
+
+                writes.submit(Game.update(year = 1999).where(Game.id == 2).execute)
+                writes.submit(Game.create, name = None, author = 'Valve', year = 2000)
+                # close записывает очередь, ошибочная запись не мешает остальным в группе
+                logger.disable('src.writer')
+                writes.close()
+                logger.enable('src.writer')
+                tests._assert(Game.get_by_id(2).year, 1999)
+                tests._assert(writes.failed, 1)
+                tests._assert(len(database._in_use), 1)
+            database.close_all()
+
+        return tests
+
+    Tests.run_test(test_group_commit)
 
 if __name__ == "__main__":
-    test_inputs()
\ No newline at end of file
+    test_inputs()
+    test_locale()
+    test_keys()
+    test_stats()
+    test_database()
+    test_search()
+    test_facets()
+    test_server()
+    test_api()
+    test_writer()